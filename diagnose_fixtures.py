@@ -1,11 +1,22 @@
 import os
 import json
+import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
 
 # API-Football setup
-API_KEY = os.getenv('API_FOOTBALL_KEY', 'your_api_key_here')
-print(f"API Key loaded: {API_KEY[:5]}...{API_KEY[-5:] if len(API_KEY) > 10 else ''}")
+API_KEY = os.getenv('API_FOOTBALL_KEY')
+if not API_KEY:
+    raise SystemExit("API_FOOTBALL_KEY environment variable is not set")
+
+# Heroku sets DYNO on every dyno; read it once at import
+_IS_HEROKU = bool(os.environ.get('DYNO'))
 
 # League IDs
 LEAGUES = {
@@ -17,17 +28,27 @@ LEAGUES = {
     'Süper Lig': 203
 }
 
+# Shared session so the per-league requests reuse keep-alive connections
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+SESSION.headers.update({
+    'x-rapidapi-host': 'v3.football.api-sports.io',
+    'x-rapidapi-key': API_KEY,
+    'Accept-Encoding': 'gzip, br'  # Decoded transparently by urllib3 (br needs the brotli package)
+})
+
 def api_football_request(endpoint, params):
     """Make a request to the API-Football API with proper headers."""
     try:
         print(f"Making API request to {endpoint} with params: {params}")
-        response = requests.get(
+        response = SESSION.get(
             f'https://v3.football.api-sports.io/{endpoint}',
-            headers={
-                'x-rapidapi-host': 'v3.football.api-sports.io',
-                'x-rapidapi-key': API_KEY
-            },
-            params=params
+            params=params,
+            timeout=(3.05, 10)
         )
         
         print(f"API response status: {response.status_code}")
@@ -36,78 +57,88 @@ def api_football_request(endpoint, params):
             print(f"API Error: Status {response.status_code} for {endpoint}")
             return None
             
-        data = response.json()
+        data = orjson.loads(response.content)  # Parse the raw bytes; much faster than response.json()
         
         if data.get('errors'):
             print(f"API Error: {data['errors']}")
             return None
             
         return data
-    except Exception as e:
-        print(f"API Request Error ({endpoint}): {e}")
-        import traceback
-        print(traceback.format_exc())
+    except (requests.RequestException, orjson.JSONDecodeError):
+        logger.exception("API request failed: %s", endpoint)
         return None
 
-def fetch_fixtures(league):
-    """Fetch fixtures for a league in the next 7 days."""
+def fetch_fixtures(league_ids, from_date=None, to_date=None):
+    """Fetch fixtures for several leagues in the next 7 days with a single request.
+    
+    Dates are 'YYYY-MM-DD' strings and default to today and today + 7 days.
+    Returns a dict mapping each league ID to its list of fixtures.
+    """
+    fixtures_by_league = defaultdict(list)
+    leagues_param = ','.join(map(str, league_ids))
     try:
-        today = datetime.now()
-        end_date = today + timedelta(days=7)
+        if from_date is None or to_date is None:
+            today = datetime.now()
+            from_date = from_date or today.strftime('%Y-%m-%d')
+            to_date = to_date or (today + timedelta(days=7)).strftime('%Y-%m-%d')
         
-        print(f"\n=== Fetching fixtures for league {league} ===")
-        print(f"Date range: {today.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+        print(f"\n=== Fetching fixtures for leagues {leagues_param} ===")
+        print(f"Date range: {from_date} to {to_date}")
         
         data = api_football_request('fixtures', {
-            'from': today.strftime('%Y-%m-%d'),
-            'to': end_date.strftime('%Y-%m-%d'),
-            'league': league,
+            'from': from_date,
+            'to': to_date,
+            'league': leagues_param,
             'season': '2024',
             'timezone': 'Europe/London'
         })
         
         if not data:
-            print(f"❌ No data returned from API for {league}")
-            return []
+            print(f"❌ No data returned from API for {leagues_param}")
+            return fixtures_by_league
             
         if not data.get('response'):
-            print(f"ℹ️ No fixtures found for {league} in the next 7 days.")
-            return []
+            print(f"ℹ️ No fixtures found for {leagues_param} in the next 7 days.")
+            return fixtures_by_league
         
-        print(f"✅ Found {len(data['response'])} fixtures for {league}")
+        print(f"✅ Found {len(data['response'])} fixtures for {leagues_param}")
         
-        fixtures = []
         for match in data['response']:
+            fx = match['fixture']
+            home = match['teams']['home']
+            away = match['teams']['away']
+            lg = match['league']
             fixture_data = {
-                'fixture_id': match['fixture']['id'],
-                'homeTeam': match['teams']['home']['name'],
-                'home_team_id': match['teams']['home']['id'],
-                'awayTeam': match['teams']['away']['name'],
-                'away_team_id': match['teams']['away']['id'],
-                'date': match['fixture']['date'],
-                'league': match['league']['name'],
-                'country': match['league']['country']
+                'fixture_id': fx['id'],
+                'homeTeam': home['name'],
+                'home_team_id': home['id'],
+                'awayTeam': away['name'],
+                'away_team_id': away['id'],
+                'date': fx['date'],
+                'league': lg['name'],
+                'country': lg['country']
             }
-            fixtures.append(fixture_data)
+            fixtures_by_league[lg['id']].append(fixture_data)
             print(f"✅ Added fixture: {fixture_data['homeTeam']} vs {fixture_data['awayTeam']} on {fixture_data['date']}")
         
-        return fixtures
-    except Exception as e:
-        print(f"❌ Error fetching fixtures for {league}: {e}")
-        import traceback
-        print(traceback.format_exc())
-        return []
+        return fixtures_by_league
+    except (KeyError, TypeError):
+        # Malformed fixture payload; report it and keep whatever was parsed
+        logger.exception("Error parsing fixtures for %s", leagues_param)
+        return fixtures_by_league
 
 def main():
     """Run diagnostics for fixtures data."""
+    logging.basicConfig(level=logging.INFO)
     print("=== MyBetBuddy Fixtures Diagnostics ===")
-    print(f"Running on: {'Heroku' if os.environ.get('DYNO') else 'Local'}")
-    print(f"Current time: {datetime.now()}")
+    print(f"Running on: {'Heroku' if _IS_HEROKU else 'Local'}")
+    now = datetime.now()
+    print(f"Current time: {now}")
     
     # Check environment variables
     print("\n=== Environment Variables ===")
     env_vars = {
-        'API_FOOTBALL_KEY': os.getenv('API_FOOTBALL_KEY', '')[:5] + '...' if os.getenv('API_FOOTBALL_KEY') else 'Not set',
+        'API_FOOTBALL_KEY': 'Set' if os.getenv('API_FOOTBALL_KEY') else 'Not set',
         'DYNO': os.getenv('DYNO', 'Not set'),
         'PORT': os.getenv('PORT', 'Not set')
     }
@@ -126,9 +157,15 @@ def main():
     else:
         print("API Status: Failed to get status")
     
-    # Fetch fixtures for top leagues
+    # Fetch fixtures for all top leagues in one request
+    fixtures_by_league = fetch_fixtures(
+        list(LEAGUES.values()),
+        from_date=now.strftime('%Y-%m-%d'),
+        to_date=(now + timedelta(days=7)).strftime('%Y-%m-%d')
+    )
+    
     for league_name, league_id in LEAGUES.items():
-        fixtures = fetch_fixtures(league_id)
+        fixtures = fixtures_by_league.get(league_id, [])
         print(f"\nResults for {league_name}: {len(fixtures)} fixtures found")
         
         if fixtures:
@@ -3,7 +3,9 @@
 from .fetch_fixtures import (
     fetch_fixtures,
     fetch_standings,
+    fetch_league_standings,
     fetch_predictions,
+    fetch_predictions_batch,
     fetch_head_to_head,
     fetch_team_statistics,
     fetch_players,
@@ -3,32 +3,65 @@ Simple cache implementation for MyBetBuddy predictions.
 """
 
 import os
-import json
-from datetime import datetime, timedelta
+import time
+import logging
+import tempfile
+import threading
+import orjson
+from datetime import datetime
 import hashlib
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Set
+
+logger = logging.getLogger(__name__)
 
 class DataCache:
-    def __init__(self, cache_dir='cache'):
+    def __init__(self, cache_dir='cache', max_memory_entries: int = 2048):
         self.cache_dir = cache_dir
-        self._memory_cache = {}
+        self.max_memory_entries = max_memory_entries
+        self._memory_cache: OrderedDict = OrderedDict()  # LRU order, oldest first
+        self._index: Dict[str, Set[str]] = {}  # data_type -> cache keys present on disk or in memory
+        self._lock = threading.Lock()  # Guards _memory_cache and _index across worker threads
         self._ensure_cache_dir()
-        print(f"DEBUG: Cache initialized with directory {self.cache_dir}")
+        self._build_index()
+        logger.debug("Cache initialized with directory %s", self.cache_dir)
         
     def _ensure_cache_dir(self):
         """Ensure the cache directory exists."""
         if not os.path.exists(self.cache_dir):
             try:
                 os.makedirs(self.cache_dir)
-                print(f"DEBUG: Created cache directory {self.cache_dir}")
-            except Exception as e:
-                print(f"ERROR: Failed to create cache directory: {str(e)}")
+                logger.debug("Created cache directory %s", self.cache_dir)
+            except Exception:
+                logger.exception("Failed to create cache directory %s", self.cache_dir)
+    
+    def _build_index(self):
+        """Index existing cache files by data type with a single directory scan."""
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json'):
+                        cache_key = entry.name[:-len('.json')]
+                        data_type = cache_key.rpartition(':')[0]
+                        self._index.setdefault(data_type, set()).add(cache_key)
+        except Exception:
+            logger.exception("Failed to index cache directory %s", self.cache_dir)
+    
+    def _remember(self, cache_key: str, cache_data: Dict):
+        """Store an entry in the in-memory cache, evicting least recently used entries."""
+        with self._lock:
+            self._memory_cache[cache_key] = cache_data
+            self._memory_cache.move_to_end(cache_key)
+            while len(self._memory_cache) > self.max_memory_entries:
+                self._memory_cache.popitem(last=False)
     
     def _get_cache_key(self, data_type: str, params: Dict) -> str:
         """Generate a unique cache key for the data type and parameters."""
-        sorted_params = sorted(params.items())
-        param_str = json.dumps(sorted_params)
-        return f"{data_type}:{hashlib.md5(param_str.encode()).hexdigest()}"
+        # Serializing and hashing take microseconds; a memo keyed on the raw values would merge
+        # 1, 1.0 and True (equal and same hash in Python) into whichever key was seen first
+        param_str = orjson.dumps(tuple(sorted(params.items())),
+                                 option=orjson.OPT_SORT_KEYS)  # Nested dicts key the same in any order
+        return f"{data_type}:{hashlib.blake2b(param_str, digest_size=16).hexdigest()}"
     
     def _get_cache_path(self, cache_key: str) -> str:
         """Get the full path for a cache file."""
@@ -37,25 +70,27 @@ class DataCache:
     def _is_cache_valid(self, cache_data: Dict, max_age_hours: int, data_type: str) -> bool:
         """Check if cache is valid based on age and match times."""
         try:
-            cache_time = datetime.fromisoformat(cache_data['timestamp'])
-            if datetime.now() - cache_time > timedelta(hours=max_age_hours):
-                print(f"DEBUG: Cache expired - created at {cache_time}")
+            cache_time = cache_data['timestamp']
+            cache_age = time.time() - cache_time
+            if cache_age > max_age_hours * 3600:
+                logger.debug("Cache expired - created %.0f seconds ago", cache_age)
                 return False
             
             # For standings and fixtures, check if any matches have been played since cache was created
             if data_type in ['standings', 'fixtures']:
                 if 'last_match_time' in cache_data:
-                    last_match_time = datetime.fromisoformat(cache_data['last_match_time'])
+                    last_match_time = cache_data['last_match_time']
                     if last_match_time > cache_time:
-                        print(f"DEBUG: New matches played since cache was created")
+                        logger.debug("New matches played since cache was created")
                         return False
             
             return True
-        except Exception as e:
-            print(f"ERROR: Cache validation error: {str(e)}")
+        except Exception:
+            logger.exception("Cache validation error")
             return False
     
-    def get(self, data_type: str, params: Dict, max_age_hours: Optional[int] = None) -> Optional[Dict]:
+    def get(self, data_type: str, params: Dict, max_age_hours: Optional[float] = None,
+            keep_expired: bool = False) -> Optional[Dict]:
         """
         Get cached data if it exists and is not too old.
         
@@ -63,6 +98,7 @@ class DataCache:
             data_type: Type of data (e.g., 'team_stats', 'h2h', 'standings', 'fixtures')
             params: Dictionary of parameters used to fetch the data
             max_age_hours: Maximum age of cached data in hours. If None, uses default based on data_type
+            keep_expired: Leave expired entries in place so they can still be served as a stale fallback
             
         Returns:
             Cached data if valid, None otherwise
@@ -80,33 +116,39 @@ class DataCache:
         
         try:
             # Try in-memory cache first
-            if cache_key in self._memory_cache:
-                cache_data = self._memory_cache[cache_key]
-                if self._is_cache_valid(cache_data, max_age_hours, data_type):
-                    return cache_data['data']
-                else:
-                    del self._memory_cache[cache_key]
+            with self._lock:
+                cache_data = self._memory_cache.get(cache_key)
+                if cache_data is not None:
+                    if self._is_cache_valid(cache_data, max_age_hours, data_type):
+                        self._memory_cache.move_to_end(cache_key)
+                        return cache_data['data']
+                    elif not keep_expired:
+                        del self._memory_cache[cache_key]
             
             # Try file-based cache
             cache_path = self._get_cache_path(cache_key)
             if os.path.exists(cache_path):
                 try:
-                    with open(cache_path, 'r') as f:
-                        cache_data = json.load(f)
+                    with open(cache_path, 'rb') as f:
+                        cache_data = orjson.loads(f.read())
                         if self._is_cache_valid(cache_data, max_age_hours, data_type):
                             # Update in-memory cache
-                            self._memory_cache[cache_key] = cache_data
+                            self._remember(cache_key, cache_data)
                             return cache_data['data']
-                        else:
+                        elif not keep_expired:
                             # Remove expired file cache
                             os.remove(cache_path)
-                except Exception as e:
-                    print(f"ERROR: File cache read error: {str(e)}")
+                except orjson.JSONDecodeError:
+                    # Corrupt file (e.g. interrupted write); drop it so the next fetch rewrites it
+                    logger.warning("Removing corrupt cache file %s", cache_path)
+                    os.remove(cache_path)
+                except Exception:
+                    logger.exception("File cache read error for %s", cache_path)
             
             return None
             
-        except Exception as e:
-            print(f"ERROR: Cache read error: {str(e)}")
+        except Exception:
+            logger.exception("Cache read error for %s", data_type)
             return None
     
     def set(self, data_type: str, params: Dict, data: Any, last_match_time: Optional[datetime] = None):
@@ -122,26 +164,34 @@ class DataCache:
         cache_key = self._get_cache_key(data_type, params)
         
         cache_data = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': time.time(),
             'data': data
         }
         
         if last_match_time:
-            cache_data['last_match_time'] = last_match_time.isoformat()
+            cache_data['last_match_time'] = last_match_time.timestamp()
         
         try:
             # Update in-memory cache
-            self._memory_cache[cache_key] = cache_data
+            self._remember(cache_key, cache_data)
+            with self._lock:
+                self._index.setdefault(data_type, set()).add(cache_key)
             
-            # Update file cache
-            cache_path = self._get_cache_path(cache_key)
-            with open(cache_path, 'w') as f:
-                json.dump(cache_data, f)
+            # Update file cache atomically so readers never see a half-written file; each writer
+            # gets its own temporary file so concurrent writes of one key can't interleave
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(orjson.dumps(cache_data, option=orjson.OPT_SERIALIZE_NUMPY))
+                os.replace(tmp_path, self._get_cache_path(cache_key))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
                 
-            print(f"DEBUG: Successfully cached {data_type}")
+            logger.debug("Successfully cached %s", data_type)
             
-        except Exception as e:
-            print(f"ERROR: Cache write error: {str(e)}")
+        except Exception:
+            logger.exception("Cache write error for %s", data_type)
     
     def clear(self, data_type: Optional[str] = None):
         """
@@ -151,27 +201,31 @@ class DataCache:
             data_type: Optional type of data to clear. If None, clears all cache.
         """
         try:
-            # Clear in-memory cache
-            if data_type:
-                keys_to_remove = [k for k in self._memory_cache.keys() if k.startswith(f"{data_type}:")]
-                for k in keys_to_remove:
-                    del self._memory_cache[k]
-            else:
-                self._memory_cache.clear()
+            with self._lock:
+                data_types = [data_type] if data_type else list(self._index)
+                cache_keys = [key for dt in data_types for key in self._index.pop(dt, set())]
+                
+                # Clear in-memory cache
+                if data_type:
+                    for cache_key in cache_keys:
+                        self._memory_cache.pop(cache_key, None)
+                else:
+                    self._memory_cache.clear()
             
             # Clear file cache
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    if data_type is None or filename.startswith(f"{data_type}:"):
-                        try:
-                            os.remove(os.path.join(self.cache_dir, filename))
-                        except Exception as e:
-                            print(f"ERROR: Failed to remove cache file {filename}: {str(e)}")
-                    
-            print(f"DEBUG: Cleared cache for {data_type if data_type else 'all types'}")
+            for cache_key in cache_keys:
+                cache_path = self._get_cache_path(cache_key)
+                try:
+                    os.remove(cache_path)
+                except FileNotFoundError:
+                    pass
+                except Exception:
+                    logger.exception("Failed to remove cache file %s", cache_path)
+            
+            logger.debug("Cleared cache for %s", data_type or 'all types')
             
-        except Exception as e:
-            print(f"ERROR: Cache clear error: {str(e)}")
+        except Exception:
+            logger.exception("Cache clear error")
 
 # Create a global cache instance
 cache = DataCache() 
\ No newline at end of file
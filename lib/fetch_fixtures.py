@@ -1,14 +1,25 @@
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from collections import deque
 import os
+import logging
+import threading
 import time
 import streamlit as st
 from dotenv import load_dotenv
 import pandas as pd
+from lib.cache import cache
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # League IDs
 LEAGUES = {
     # England
@@ -51,297 +62,378 @@ LEAGUES = {
     'Super League': 183  # Swiss Super League
 }
 
-API_KEY = os.getenv('API_FOOTBALL_KEY', 'your_api_key_here')
+API_KEY = os.getenv('API_FOOTBALL_KEY')
+
+# Shared session so every API call reuses pooled keep-alive connections
+SESSION = requests.Session()
+# pool_maxsize covers the standings thread pool plus concurrent Streamlit sessions
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+SESSION.headers.update({
+    'x-rapidapi-host': 'v3.football.api-sports.io',
+    'x-rapidapi-key': API_KEY,
+    'Accept-Encoding': 'gzip, br'  # Decoded transparently by urllib3 (br needs the brotli package)
+})
+
+API_BASE_URL = 'https://v3.football.api-sports.io'
+API_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+# Prebound GET per endpoint so each call skips URL building; per-endpoint timeouts can be set here
+API_ENDPOINTS = (
+    'fixtures', 'fixtures/headtohead', 'fixtures/lineups', 'standings', 'predictions',
+    'teams/statistics', 'players', 'injuries', 'venues', 'leagues'
+)
+_GETTERS = {
+    endpoint: partial(SESSION.get, f'{API_BASE_URL}/{endpoint}', timeout=API_TIMEOUT)
+    for endpoint in API_ENDPOINTS
+}
+
+# Special handling for leagues with known issues
+PROBLEM_LEAGUES = {
+    'Superliga': {'season': 2023, 'expected_teams': 12, 'multiple_groups': True},
+    'Super League 1': {'season': 2023, 'expected_teams': 14, 'multiple_groups': True},
+    'Primeira Liga': {'season': 2023, 'expected_teams': 18}
+}
+
+# Flattened API fixture fields -> keys used by the app's fixture records
+FIXTURE_COLUMNS = {
+    'fixture.id': 'fixture_id',
+    'teams.home.name': 'homeTeam',
+    'teams.home.id': 'home_team_id',
+    'teams.away.name': 'awayTeam',
+    'teams.away.id': 'away_team_id',
+    'fixture.date': 'date',
+    'league.name': 'league',
+    'league.country': 'country',
+    'fixture.venue.name': 'venue'
+}
+
+# Flattened API standings fields -> keys used by the app's standings tables
+STANDINGS_COLUMNS = {
+    'team.name': 'team',
+    'team.id': 'team_id',
+    'rank': 'rank',
+    'points': 'points',
+    'goalsDiff': 'goalsDiff',
+    'all.played': 'played',
+    'all.win': 'won',
+    'all.draw': 'drawn',
+    'all.lose': 'lost',
+    'all.goals.for': 'for',
+    'all.goals.against': 'against',
+    'form': 'form'
+}
+
+# Upper bound on concurrent API requests from a single fan-out (kept under the API rate limit)
+MAX_CONCURRENT_REQUESTS = 8
 
-print("API Key Loaded:", API_KEY[:5] + "..." + API_KEY[-5:])  # Print the first and last 5 characters of the API key for verification
+# At most API_RATE_LIMIT HTTP requests per API_RATE_WINDOW seconds, shared by all threads.
+# Only real requests are throttled; cached responses never wait.
+API_RATE_LIMIT = 10
+API_RATE_WINDOW = 1.0
+_request_times = deque(maxlen=API_RATE_LIMIT)  # Monotonic start times of the latest (or reserved) requests
+_rate_lock = threading.Lock()
+
+# How long raw API responses stay fresh in the on-disk cache, by endpoint (hours).
+# This persists across restarts underneath the in-process st.cache_data layer.
+API_CACHE_HOURS = {
+    'fixtures': 0.25,
+    'predictions': 1,
+    'players': 24,
+    'leagues': 24 * 7,
+    'venues': 24 * 30
+}
+DEFAULT_API_CACHE_HOURS = 1
+STALE_API_CACHE_HOURS = 24 * 7  # Oldest response served when the API is unreachable
 
 # Base API function to reduce repetition
 def api_football_request(endpoint, params):
-    """Make a request to the API-Football API with proper headers."""
+    """Make a request to the API-Football API with proper headers.
+    
+    Responses are cached on disk per endpoint and parameters. Expired entries are
+    revalidated with the stored ETag/Last-Modified, and if the API call fails a
+    stale cached response (up to STALE_API_CACHE_HOURS old) is returned.
+    """
+    cache_params = {'endpoint': endpoint, **params}
+    max_age = API_CACHE_HOURS.get(endpoint.split('/')[0], DEFAULT_API_CACHE_HOURS)
+    entry = cache.get('api', cache_params, max_age_hours=max_age, keep_expired=True)
+    if entry is not None:
+        return entry['data']
+    
+    stale = cache.get('api', cache_params, max_age_hours=STALE_API_CACHE_HOURS)
+    entry = _request_api(endpoint, params, stale)
+    if entry is not None:
+        cache.set('api', cache_params, entry)
+        return entry['data']
+    
+    if stale is not None:
+        logger.warning("Serving stale cached response for %s", endpoint)
+        return stale['data']
+    return None
+
+def _wait_for_rate_limit():
+    """Block until another request fits in the API_RATE_LIMIT window."""
+    # Reserve the earliest free slot under the lock, then wait for it without holding the lock
+    with _rate_lock:
+        now = time.monotonic()
+        start = now
+        if len(_request_times) == API_RATE_LIMIT:
+            start = max(now, _request_times[0] + API_RATE_WINDOW)
+        _request_times.append(start)
+    if start > now:
+        time.sleep(start - now)
+
+def _request_api(endpoint, params, cached=None):
+    """Perform the HTTP request, returning a cache entry or None on failure.
+    
+    The entry holds the decoded payload plus the response's validators. When a
+    previous entry is given, the request is conditional and a 304 reuses it.
+    """
+    if not API_KEY:
+        # Fail loudly rather than sending unauthenticated requests
+        raise RuntimeError("API_FOOTBALL_KEY environment variable is not set")
+    
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    
     try:
-        response = requests.get(
-            f'https://v3.football.api-sports.io/{endpoint}',
-            headers={
-                'x-rapidapi-host': 'v3.football.api-sports.io',
-                'x-rapidapi-key': API_KEY
-            },
-            params=params
-        )
+        getter = _GETTERS.get(endpoint)
+        if getter is None:
+            getter = partial(SESSION.get, f'{API_BASE_URL}/{endpoint}', timeout=API_TIMEOUT)
+        _wait_for_rate_limit()
+        response = getter(params=params, headers=headers)
+        
+        if response.status_code == 304 and cached:
+            logger.debug("Not modified: %s", endpoint)
+            return cached
         
         # Only log errors, not successful requests
         if response.status_code != 200:
-            print(f"API Error: Status {response.status_code} for {endpoint}")
+            logger.warning("API Error: Status %s for %s", response.status_code, endpoint)
             return None
             
-        data = response.json()
+        data = orjson.loads(response.content)  # Parse the raw bytes; much faster than response.json()
         
         if data.get('errors'):
-            print(f"API Error: {data['errors']}")
+            logger.warning("API Error for %s: %s", endpoint, data['errors'])
             return None
             
-        return data
-    except Exception as e:
-        print(f"API Request Error ({endpoint}): {e}")
-        import traceback
-        print(traceback.format_exc())
+        return {
+            'data': data,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+    except orjson.JSONDecodeError as e:
+        # Truncated or non-JSON body (e.g. an HTML error page); no traceback needed
+        logger.warning("API Error: invalid JSON from %s: %s", endpoint, e)
+        return None
+    except Exception:
+        logger.exception("API Request Error (%s)", endpoint)
         return None
 
 @st.cache_data(ttl=1800)  # Cache for 30 minutes instead of 1 hour
 def fetch_fixtures(league):
     try:
         today = datetime.now()
-        end_date = today + timedelta(days=7)
+        from_date = today.strftime('%Y-%m-%d')
+        to_date = (today + timedelta(days=7)).strftime('%Y-%m-%d')
         
-        print(f"\n=== Fetching fixtures for league {league} ===")
-        print(f"Date range: {today.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+        logger.debug("Fetching fixtures for league %s from %s to %s", league, from_date, to_date)
         
         data = api_football_request('fixtures', {
-            'from': today.strftime('%Y-%m-%d'),
-            'to': end_date.strftime('%Y-%m-%d'),
+            'from': from_date,
+            'to': to_date,
             'league': league,
             'season': '2024',
             'timezone': 'Europe/London'
         })
         
         if not data:
-            print(f"❌ No data returned from API for {league}")
+            logger.warning("No data returned from API for %s", league)
             return []
             
         if not data.get('response'):
-            print(f"ℹ️ No fixtures found for {league} in the next 7 days. This could be due to:")
-            print(f"   - League break (e.g., international break, cup competitions)")
-            print(f"   - Season break")
-            print(f"   - No scheduled matches in this period")
+            # Usually an international/cup break or the off-season
+            logger.info("No fixtures found for %s in the next 7 days", league)
             return []
         
-        print(f"✅ Found {len(data['response'])} fixtures for {league}")
+        logger.debug("Found %d fixtures for %s", len(data['response']), league)
         
-        fixtures = []
-        for match in data['response']:
-            fixture_data = {
-                'fixture_id': match['fixture']['id'],
-                'homeTeam': match['teams']['home']['name'],
-                'home_team_id': match['teams']['home']['id'],
-                'awayTeam': match['teams']['away']['name'],
-                'away_team_id': match['teams']['away']['id'],
-                'date': match['fixture']['date'],
-                'league': match['league']['name'],
-                'country': match['league']['country'],
-                'venue': match['fixture']['venue']['name'] if match['fixture'].get('venue') else 'Unknown'
-            }
-            fixtures.append(fixture_data)
-            print(f"✅ Added fixture: {fixture_data['homeTeam']} vs {fixture_data['awayTeam']} on {fixture_data['date']}")
+        # Flatten the nested response in one pass instead of building each record by hand
+        df = pd.json_normalize(data['response']).reindex(columns=list(FIXTURE_COLUMNS))
+        df = df.rename(columns=FIXTURE_COLUMNS)
+        df['venue'] = df['venue'].fillna('Unknown')
         
-        return fixtures
-    except Exception as e:
-        print(f"❌ Error fetching fixtures for {league}: {e}")
-        import traceback
-        print(traceback.format_exc())
+        return df.to_dict('records')
+    except Exception:
+        logger.exception("Error fetching fixtures for %s", league)
         return []
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+def _flatten_groups(groups, multi):
+    """Return a single team list from a league's standings groups.
+    
+    Leagues split into championship/relegation groups (multi) have all groups
+    combined with duplicate teams dropped; other leagues use the first group.
+    """
+    if not (multi and isinstance(groups, list) and len(groups) > 1):
+        return groups[0] if groups else []
+    
+    logger.debug("Combining %d standings groups", len(groups))
+    # Keyed on team ID: keeps each team's first entry, in order, with one lookup per row
+    merged = {}
+    for group in groups:
+        for team in group:
+            merged.setdefault(team['team']['id'], team)
+    return list(merged.values())
+
+def _load_season_standings(league_id, season, multi):
+    """Fetch one season's standings for a league as a flat list of team entries."""
+    data = api_football_request('standings', {
+        'season': season,
+        'league': league_id
+    })
+    
+    if data and data.get('response'):
+        for league_data in data['response']:
+            groups = league_data['league'].get('standings')
+            if groups:
+                return _flatten_groups(groups, multi)
+    return []
+
+@st.cache_data(ttl=3600, show_spinner=False)  # Cached per league so one failure doesn't refetch the rest
+def fetch_league_standings(league_name, league_id):
+    """Fetch and process the standings table for a single league as a DataFrame.
+    
+    Raises ValueError when no standings are available so the empty result
+    is not cached and the league is retried on the next call.
+    """
+    logger.debug("Fetching standings for %s", league_name)
+    
+    # Resolve the league's special handling once
+    cfg = PROBLEM_LEAGUES.get(league_name)
+    use_season = cfg['season'] if cfg else 2024  # Problem leagues start from their recommended season
+    multi = bool(cfg and cfg.get('multiple_groups'))
+    expected = cfg['expected_teams'] if cfg else 0
+    
+    league_standings = _load_season_standings(league_id, use_season, multi)
+    
+    # Empty or incomplete data: try the other season and keep whichever has more teams
+    if len(league_standings) < max(expected, 1):
+        logger.warning("Received incomplete standings data for %s. Only %d teams.", league_name, len(league_standings))
+        alt_season = 2023 if use_season == 2024 else 2024
+        logger.debug("Trying season %s for %s", alt_season, league_name)
+        
+        alt_standings = _load_season_standings(league_id, alt_season, multi)
+        if len(alt_standings) > len(league_standings):
+            logger.info("Using %s season data for %s which has %d teams", alt_season, league_name, len(alt_standings))
+            league_standings = alt_standings
+    
+    if not league_standings:
+        raise ValueError(f"No standings data returned for {league_name}")
+    
+    # Final processed standings: dedupe, order by points, goal difference, goals for, then re-rank
+    df = pd.json_normalize(league_standings).reindex(columns=list(STANDINGS_COLUMNS))
+    df = df.rename(columns=STANDINGS_COLUMNS).drop_duplicates('team_id')
+    df = df.sort_values(['points', 'goalsDiff', 'for'], ascending=False, na_position='last')
+    df['rank'] = range(1, len(df) + 1)
+    
+    logger.debug("Added %s standings with %d teams", league_name, len(df))
+    return df.reset_index(drop=True)
+
+def _empty_standings():
+    """Return an empty standings table with the usual columns (rank is int, as in real tables)."""
+    return pd.DataFrame(columns=list(STANDINGS_COLUMNS.values())).astype({'rank': int})
+
+# Most recent successful standings table per league, served when a refresh fails
+_LAST_GOOD_STANDINGS = {}
+
+def _safe_league_standings(league):
+    """Fetch one league's standings, falling back to its last good table (or an empty one) on failure."""
+    league_name, league_id = league
+    try:
+        table = fetch_league_standings(league_name, league_id)
+    except Exception as e:
+        logger.warning("Error fetching standings for %s: %s", league_name, e)
+        return _LAST_GOOD_STANDINGS.get(league_name, _empty_standings())
+    _LAST_GOOD_STANDINGS[league_name] = table
+    return table
+
 def fetch_standings():
     try:
-        standings = {league: [] for league in LEAGUES.keys()}  # Create a dictionary for each league
+        # Leagues are independent, so fetch them concurrently over the shared session.
+        # Each league is cached on its own, so only expired or failed leagues hit the API;
+        # a failed league keeps its last good table.
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            return dict(zip(LEAGUES.keys(), executor.map(_safe_league_standings, LEAGUES.items())))
         
-        # Special handling for leagues with known issues
-        problem_leagues = {
-            'Superliga': {'season': 2023, 'expected_teams': 12, 'multiple_groups': True},
-            'Super League 1': {'season': 2023, 'expected_teams': 14, 'multiple_groups': True},
-            'Primeira Liga': {'season': 2023, 'expected_teams': 18}
-        }
-        
-        for league_name, league_id in LEAGUES.items():
-            print(f"Fetching standings for {league_name}")
-            
-            # First try current season (2024)
-            use_season = 2024
-            if league_name in problem_leagues:
-                # For problem leagues, try recommended season first
-                use_season = problem_leagues[league_name]['season']
-            
-            data = api_football_request('standings', {
-                'season': use_season,
-                'league': league_id
-            })
-            
-            if data and data.get('response'):
-                for league_data in data['response']:
-                    if league_data['league'].get('standings'):
-                        # Check if we have multiple standings groups (championship/relegation format)
-                        standings_groups = league_data['league']['standings']
-                        
-                        # Handle leagues with multiple groups (championship and relegation groups)
-                        if isinstance(standings_groups, list) and len(standings_groups) > 1 and league_name in problem_leagues and problem_leagues[league_name].get('multiple_groups'):
-                            print(f"Found multiple standings groups for {league_name}: {len(standings_groups)} groups")
-                            
-                            # Combine all groups but keep track of seen teams to avoid duplicates
-                            league_standings = []
-                            seen_team_ids = set()
-                            
-                            for group in standings_groups:
-                                for team in group:
-                                    if team['team']['id'] not in seen_team_ids:
-                                        league_standings.append(team)
-                                        seen_team_ids.add(team['team']['id'])
-                                    else:
-                                        print(f"Skipping duplicate team: {team['team']['name']} (ID: {team['team']['id']})")
-                        else:
-                            # Use the first group (normal leagues)
-                            league_standings = standings_groups[0] if standings_groups else []
-                        
-                        # Check if we got meaningful data
-                        if (not league_standings or 
-                            (league_name in problem_leagues and 
-                             len(league_standings) < problem_leagues[league_name]['expected_teams'])):
-                            
-                            print(f"Warning: Received incomplete standings data for {league_name}. Only {len(league_standings) if league_standings else 0} teams.")
-                            
-                            # Try alternative season for problem leagues
-                            alt_season = 2023 if use_season == 2024 else 2024
-                            print(f"Trying season {alt_season} for {league_name}")
-                            
-                            alt_data = api_football_request('standings', {
-                                'season': alt_season,
-                                'league': league_id
-                            })
-                            
-                            if alt_data and alt_data.get('response'):
-                                for alt_league_data in alt_data['response']:
-                                    if alt_league_data['league'].get('standings'):
-                                        # Multiple groups for alternative season
-                                        alt_standings_groups = alt_league_data['league']['standings']
-                                        
-                                        if isinstance(alt_standings_groups, list) and len(alt_standings_groups) > 1 and league_name in problem_leagues and problem_leagues[league_name].get('multiple_groups'):
-                                            print(f"Found multiple standings groups for {league_name} in season {alt_season}: {len(alt_standings_groups)} groups")
-                                            
-                                            # Combine all groups but avoid duplicates
-                                            alt_standings = []
-                                            seen_team_ids = set()
-                                            
-                                            for group in alt_standings_groups:
-                                                for team in group:
-                                                    if team['team']['id'] not in seen_team_ids:
-                                                        alt_standings.append(team)
-                                                        seen_team_ids.add(team['team']['id'])
-                                                    else:
-                                                        print(f"Skipping duplicate team: {team['team']['name']} (ID: {team['team']['id']})")
-                                        else:
-                                            # Use the first group (normal leagues)
-                                            alt_standings = alt_standings_groups[0] if alt_standings_groups else []
-                                        
-                                        if alt_standings and len(alt_standings) > len(league_standings):
-                                            print(f"Using {alt_season} season data for {league_name} which has {len(alt_standings)} teams")
-                                            league_standings = alt_standings
-                        
-                        # Final processed standings with no duplicates
-                        standings_list = []
-                        seen_team_ids = set()
-                        
-                        for team in league_standings:
-                            if team['team']['id'] not in seen_team_ids:
-                                standings_list.append({
-                                    'team': team['team']['name'],
-                                    'team_id': team['team']['id'],  # Add team ID
-                                    'rank': int(team['rank']),  # Original rank (will be recalculated)
-                                    'points': team['points'],
-                                    'goalsDiff': team['goalsDiff'],
-                                    'played': team['all']['played'],
-                                    'won': team['all']['win'],
-                                    'drawn': team['all']['draw'],
-                                    'lost': team['all']['lose'],
-                                    'for': team['all']['goals']['for'],
-                                    'against': team['all']['goals']['against'],
-                                    'form': team['form']
-                                })
-                                seen_team_ids.add(team['team']['id'])
-                        
-                        # Sort by points (descending), then goal difference (descending), then goals for (descending)
-                        standings_list.sort(key=lambda x: (-x['points'] if x['points'] is not None else -999, 
-                                                          -x['goalsDiff'] if x['goalsDiff'] is not None else -999, 
-                                                          -x['for'] if x['for'] is not None else -999))
-                        
-                        # Recalculate ranks
-                        for i, team in enumerate(standings_list):
-                            team['rank'] = i + 1
-                            
-                        standings[league_name] = standings_list
-                        print(f"✅ Added {league_name} standings with {len(standings[league_name])} teams")
-            else:
-                print(f"No data returned for {league_name}.")
-                standings[league_name] = []
-            
-            time.sleep(0.1)
-            
-        return standings
-        
-    except Exception as e:
-        print(f"Error fetching standings: {e}")
-        return {}
+    except Exception:
+        logger.exception("Error fetching standings")
+        return {league: _LAST_GOOD_STANDINGS.get(league, _empty_standings()) for league in LEAGUES}
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+@st.cache_data(ttl=3600, show_spinner=False)  # Cache for 1 hour; also called from batch worker threads
 def fetch_predictions(fixture_id):
     """Fetch predictions for a specific fixture from API-Football."""
     try:
-        print(f"\n=== Fetching prediction for fixture ID: {fixture_id} ===")
+        logger.debug("Fetching prediction for fixture ID: %s", fixture_id)
         
         # Use the correct API endpoint and headers format
         data = api_football_request('predictions', {
             'fixture': fixture_id
         })
         
-        # Print the raw API response for debugging
-        print(f"Raw API Response: {data}")
+        logger.debug("Raw API Response: %s", data)
         
         if data and data.get('response') and len(data['response']) > 0:
             prediction_data = data['response'][0]
-            print(f"\nPrediction Data Structure:")
-            print(f"Keys in prediction_data: {prediction_data.keys()}")
+            logger.debug("Keys in prediction_data: %s", prediction_data.keys())
             
             if 'predictions' in prediction_data:
                 predictions = prediction_data['predictions']
-                print(f"Keys in predictions: {predictions.keys()}")
+                logger.debug("Keys in predictions: %s", predictions.keys())
                 
                 # Get the winner prediction
                 winner = predictions.get('winner', {}).get('name', '')
-                print(f"\nPredicted Winner: {winner}")
+                logger.debug("Predicted Winner: %s", winner)
                 
                 # Get the betting advice
                 advice = predictions.get('advice', '')
-                print(f"Betting Advice: {advice}")
+                logger.debug("Betting Advice: %s", advice)
                 
                 # Get the win or draw probability (it's a boolean)
                 win_or_draw = predictions.get('win_or_draw', False)
-                print(f"Win or Draw: {win_or_draw}")
+                logger.debug("Win or Draw: %s", win_or_draw)
                 
                 # Get the under/over prediction
                 under_over = predictions.get('under_over', '')
-                print(f"Under/Over: {under_over}")
+                logger.debug("Under/Over: %s", under_over)
                 
                 # Get the goals prediction
                 goals = predictions.get('goals', '')
-                print(f"Goals: {goals}")
+                logger.debug("Goals: %s", goals)
                 
                 # Get the percentages
                 if 'percent' in predictions:
                     prediction = predictions['percent']
-                    print(f"\nRaw prediction percentages: {prediction}")
+                    logger.debug("Raw prediction percentages: %s", prediction)
                     
                     # Extract the prediction percentages directly from API
                     home_win = float(prediction.get('home', '0').replace('%', ''))
                     draw = float(prediction.get('draw', '0').replace('%', ''))
                     away_win = float(prediction.get('away', '0').replace('%', ''))
                     
-                    # Print raw API data for debugging
-                    print(f"\nProcessed prediction percentages:")
-                    print(f"Home Win: {home_win}%")
-                    print(f"Draw: {draw}%")
-                    print(f"Away Win: {away_win}%")
-                    print(f"Total: {home_win + draw + away_win}%")
+                    logger.debug("Processed prediction percentages: home %s%%, draw %s%%, away %s%%",
+                                 home_win, draw, away_win)
                     
                     # Check if the predictions make sense
                     if home_win + draw + away_win != 100:
-                        print("WARNING: Prediction percentages do not sum to 100%")
+                        logger.warning("Prediction percentages do not sum to 100%% for fixture %s", fixture_id)
                         return None
                     
                     # Return the predictions with additional context
@@ -356,20 +448,28 @@ def fetch_predictions(fixture_id):
                         'goals': goals
                     }
                 else:
-                    print("No 'percent' key in predictions")
+                    logger.debug("No 'percent' key in predictions")
             else:
-                print("No 'predictions' key in prediction_data")
+                logger.debug("No 'predictions' key in prediction_data")
             
             return None
         else:
-            print(f"No prediction available for fixture ID {fixture_id}")
+            logger.debug("No prediction available for fixture ID %s", fixture_id)
             return None
-    except Exception as e:
-        print(f"Error fetching prediction: {e}")
-        import traceback
-        print(traceback.format_exc())
+    except Exception:
+        logger.exception("Error fetching prediction for fixture %s", fixture_id)
         return None
 
+def fetch_predictions_batch(fixture_ids):
+    """Fetch predictions for several fixtures concurrently.
+    
+    Each result goes through fetch_predictions, so later single-fixture calls
+    are served from its cache. Returns a dict of fixture ID -> prediction (or None).
+    """
+    fixture_ids = list(dict.fromkeys(fixture_ids))  # Drop duplicates, keep order
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        return dict(zip(fixture_ids, executor.map(fetch_predictions, fixture_ids)))
+
 # NEW FUNCTIONS FOR ADDITIONAL DATA
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -386,23 +486,25 @@ def fetch_head_to_head(team1_id, team2_id, last=10):
             
         h2h_matches = []
         for match in data['response']:
+            home = match['teams']['home']
+            away = match['teams']['away']
+            goals = match['goals']
             # Create a readable format for each match
             match_data = {
                 'date': match['fixture']['date'],
                 'league': match['league']['name'],
-                'home_team': match['teams']['home']['name'],
-                'away_team': match['teams']['away']['name'],
-                'home_goals': match['goals']['home'],
-                'away_goals': match['goals']['away'],
-                'winner': 'Draw' if match['teams']['home']['winner'] is None else 
-                         (match['teams']['home']['name'] if match['teams']['home']['winner'] else 
-                          match['teams']['away']['name'])
+                'home_team': home['name'],
+                'away_team': away['name'],
+                'home_goals': goals['home'],
+                'away_goals': goals['away'],
+                'winner': 'Draw' if home['winner'] is None else 
+                         (home['name'] if home['winner'] else away['name'])
             }
             h2h_matches.append(match_data)
             
         return h2h_matches
-    except Exception as e:
-        print(f"Error fetching head-to-head: {e}")
+    except Exception:
+        logger.exception("Error fetching head-to-head")
         return []
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -465,8 +567,8 @@ def fetch_team_statistics(team_id, league_id, season='2024'):
         }
         
         return team_stats
-    except Exception as e:
-        print(f"Error fetching team statistics: {e}")
+    except Exception:
+        logger.exception("Error fetching team statistics")
         return {}
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -483,24 +585,27 @@ def fetch_players(team_id, season='2024'):
             
         players = []
         for player in data['response']:
+            info = player['player']
+            stats = player['statistics'][0]
+            games = stats['games']
             player_data = {
-                'id': player['player']['id'],
-                'name': player['player']['name'],
-                'age': player['player']['age'],
-                'nationality': player['player']['nationality'],
-                'position': player['statistics'][0]['games']['position'],
-                'matches': player['statistics'][0]['games']['appearences'],
-                'goals': player['statistics'][0]['goals']['total'],
-                'assists': player['statistics'][0]['goals']['assists'],
-                'yellow_cards': player['statistics'][0]['cards']['yellow'],
-                'red_cards': player['statistics'][0]['cards']['red'],
-                'minutes_played': player['statistics'][0]['games']['minutes']
+                'id': info['id'],
+                'name': info['name'],
+                'age': info['age'],
+                'nationality': info['nationality'],
+                'position': games['position'],
+                'matches': games['appearences'],
+                'goals': stats['goals']['total'],
+                'assists': stats['goals']['assists'],
+                'yellow_cards': stats['cards']['yellow'],
+                'red_cards': stats['cards']['red'],
+                'minutes_played': games['minutes']
             }
             players.append(player_data)
             
         return players
-    except Exception as e:
-        print(f"Error fetching players: {e}")
+    except Exception:
+        logger.exception("Error fetching players")
         return []
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -524,8 +629,8 @@ def fetch_lineups(fixture_id):
             }
             
         return lineups
-    except Exception as e:
-        print(f"Error fetching lineups: {e}")
+    except Exception:
+        logger.exception("Error fetching lineups")
         return {}
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -553,8 +658,8 @@ def fetch_venue_info(venue_name):
             return venue_info
         else:
             return {}
-    except Exception as e:
-        print(f"Error fetching venue info: {e}")
+    except Exception:
+        logger.exception("Error fetching venue info")
         return {}
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -582,8 +687,8 @@ def fetch_injuries(team_id, league_id, season='2024'):
             injuries.append(injury_data)
             
         return injuries
-    except Exception as e:
-        print(f"Error fetching injuries: {e}")
+    except Exception:
+        logger.exception("Error fetching injuries")
         return []
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -601,85 +706,86 @@ def fetch_team_form(team_id, last=5):
             
         matches = []
         for match in data['response']:
-            is_home = match['teams']['home']['id'] == team_id
-            opponent = match['teams']['away']['name'] if is_home else match['teams']['home']['name']
-            team_goals = match['goals']['home'] if is_home else match['goals']['away']
-            opponent_goals = match['goals']['away'] if is_home else match['goals']['home']
-            result = 'W' if (is_home and match['teams']['home']['winner']) or (not is_home and match['teams']['away']['winner']) else \
-                     'L' if (is_home and not match['teams']['home']['winner'] and match['teams']['away']['winner']) or \
-                           (not is_home and not match['teams']['away']['winner'] and match['teams']['home']['winner']) else 'D'
-                           
+            home = match['teams']['home']
+            away = match['teams']['away']
+            goals = match['goals']
+            is_home = home['id'] == team_id
+            
+            # Orient everything to the requested team once, then read the result off its winner flags
+            if is_home:
+                team, opponent, team_goals, opponent_goals = home, away, goals['home'], goals['away']
+            else:
+                team, opponent, team_goals, opponent_goals = away, home, goals['away'], goals['home']
+            result = 'W' if team['winner'] else 'L' if opponent['winner'] else 'D'
+            
             match_data = {
                 'date': match['fixture']['date'],
                 'competition': match['league']['name'],
                 'venue': 'Home' if is_home else 'Away',
-                'opponent': opponent,
+                'opponent': opponent['name'],
                 'score': f"{team_goals}-{opponent_goals}",
                 'result': result
             }
             matches.append(match_data)
             
         return matches
-    except Exception as e:
-        print(f"Error fetching team form: {e}")
+    except Exception:
+        logger.exception("Error fetching team form")
         return []
 
+@st.cache_data(ttl=3600, show_spinner=False)  # Cache for 1 hour; shared by the fixture detail helpers
+def _fetch_fixture_by_id(fixture_id):
+    """Fetch the raw API payload for a single fixture, or None if unavailable."""
+    data = api_football_request('fixtures', {
+        'id': fixture_id
+    })
+    return data['response'][0] if data and data.get('response') else None
+
 @st.cache_data(ttl=3600)  # Cache for 1 hour
 def fetch_weather_for_fixture(fixture_id):
     """Fetch weather information for a fixture (if available)."""
     try:
-        data = api_football_request('fixtures', {
-            'id': fixture_id
-        })
-        
-        if not data or not data.get('response') or len(data['response']) == 0:
+        fixture = _fetch_fixture_by_id(fixture_id)
+        if not fixture:
             return {}
             
-        fixture = data['response'][0]
-        if 'fixture' in fixture and 'venue' in fixture['fixture']:
-            venue_city = fixture['fixture'].get('venue', {}).get('city', '')
-            
-            if venue_city:
-                # Note: In a real app, you might need to call a separate weather API
-                # For now, we'll return placeholder data
-                return {
-                    'city': venue_city,
-                    'temperature': 'N/A (would require weather API)',
-                    'condition': 'N/A (would require weather API)',
-                    'humidity': 'N/A (would require weather API)',
-                    'wind': 'N/A (would require weather API)'
-                }
+        venue_city = (fixture['fixture'].get('venue') or {}).get('city')
+        if venue_city:
+            # Note: In a real app, you might need to call a separate weather API
+            # For now, we'll return placeholder data
+            return {
+                'city': venue_city,
+                'temperature': 'N/A (would require weather API)',
+                'condition': 'N/A (would require weather API)',
+                'humidity': 'N/A (would require weather API)',
+                'wind': 'N/A (would require weather API)'
+            }
         return {}
-    except Exception as e:
-        print(f"Error fetching weather: {e}")
+    except Exception:
+        logger.exception("Error fetching weather")
         return {}
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
 def fetch_referee_info(fixture_id):
     """Fetch referee information for a fixture."""
     try:
-        data = api_football_request('fixtures', {
-            'id': fixture_id
-        })
-        
-        if not data or not data.get('response') or len(data['response']) == 0:
+        fixture = _fetch_fixture_by_id(fixture_id)
+        if not fixture:
             return {}
             
-        fixture = data['response'][0]
-        if 'fixture' in fixture and 'referee' in fixture['fixture']:
-            referee_name = fixture['fixture']['referee']
-            if referee_name:
-                # Return basic referee info
-                return {
-                    'name': referee_name,
-                    # In a more complete implementation, you might fetch referee stats
-                    'fixtures': 'N/A (would require additional API calls)',
-                    'yellow_cards': 'N/A (would require additional API calls)',
-                    'red_cards': 'N/A (would require additional API calls)'
-                }
+        referee_name = fixture['fixture'].get('referee')
+        if referee_name:
+            # Return basic referee info
+            return {
+                'name': referee_name,
+                # In a more complete implementation, you might fetch referee stats
+                'fixtures': 'N/A (would require additional API calls)',
+                'yellow_cards': 'N/A (would require additional API calls)',
+                'red_cards': 'N/A (would require additional API calls)'
+            }
         return {}
-    except Exception as e:
-        print(f"Error fetching referee info: {e}")
+    except Exception:
+        logger.exception("Error fetching referee info")
         return {}
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
@@ -691,7 +797,7 @@ def fetch_available_leagues():
         })
         
         if not data or not data.get('response'):
-            print("No leagues data available")
+            logger.warning("No leagues data available")
             return []
             
         leagues = []
@@ -718,8 +824,8 @@ def fetch_available_leagues():
             print(f"  {league['name']} (ID: {league['id']})")
             
         return leagues
-    except Exception as e:
-        print(f"Error fetching available leagues: {e}")
+    except Exception:
+        logger.exception("Error fetching available leagues")
         return []
 
 # Add this line at the end of the file to test the function
@@ -1,11 +1,12 @@
 import numpy as np
-from scipy.stats import poisson
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Union
 from datetime import datetime, timedelta
 from lib.fetch_fixtures import api_football_request
 import warnings
 import math
+from functools import lru_cache
+from operator import itemgetter
 from concurrent.futures import ThreadPoolExecutor
 import time
 from lib.cache import cache
@@ -16,6 +17,46 @@ import traceback
 warnings.filterwarnings('ignore', category=UserWarning)
 warnings.filterwarnings('ignore', category=RuntimeWarning)
 
+# Goal counts 0..10 and their factorials for evaluating Poisson PMFs with plain NumPy
+_MAX_GOALS = 10
+_GOALS = np.arange(_MAX_GOALS + 1)
+_GOAL_FACTORIALS = np.array([math.factorial(k) for k in range(_MAX_GOALS + 1)], dtype=np.float64)
+_LOG_GOAL_FACTORIALS = np.log(_GOAL_FACTORIALS)
+
+@lru_cache(maxsize=1024)
+def _poisson_pmf(mu: float) -> np.ndarray:
+    """Poisson probabilities of 0..10 goals for expected goals mu (memoized; the array is read-only)."""
+    if mu > 0:
+        # Evaluate in log space: one exp per entry, no large powers or tiny intermediate products
+        pmf = np.exp(_GOALS * math.log(mu) - mu - _LOG_GOAL_FACTORIALS)
+    else:
+        pmf = (_GOALS == 0).astype(np.float64)  # No expected goals: certainly 0
+    pmf.flags.writeable = False
+    return pmf
+
+def _poisson_cdf(k: float, mu: float) -> float:
+    """Probability of at most floor(k) events for a Poisson distribution with mean mu."""
+    k = math.floor(k)
+    if k < 0:
+        return 0.0
+    if k <= _MAX_GOALS:
+        return float(_poisson_pmf(mu)[:k + 1].sum())
+    return math.exp(-mu) * sum(mu ** i / math.factorial(i) for i in range(k + 1))
+
+# Labels of the 15-minute periods used by the goals-by-minute counters
+_MINUTE_PERIODS = ('0-15', '16-30', '31-45', '46-60', '61-75', '76-90')
+
+# Form letters indexed by result code + 1 (-1 = loss, 0 = draw, 1 = win)
+_RESULT_LETTERS = 'LDW'
+
+def _match_arrays(matches: List[Dict], team_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (is_home, goals scored, goals conceded) arrays for matches, oriented to team_id."""
+    n = len(matches)
+    is_home = np.fromiter((match['home_team'] == team_id for match in matches), dtype=bool, count=n)
+    home_goals = np.fromiter((match['home_goals'] for match in matches), dtype=np.int64, count=n)
+    away_goals = np.fromiter((match['away_goals'] for match in matches), dtype=np.int64, count=n)
+    return is_home, np.where(is_home, home_goals, away_goals), np.where(is_home, away_goals, home_goals)
+
 def calculate_team_stats(team_id: int, matches: Dict[str, List[Dict]]) -> Dict:
     """
     Calculate comprehensive team statistics based on historical matches.
@@ -50,14 +91,9 @@ def calculate_team_stats(team_id: int, matches: Dict[str, List[Dict]]) -> Dict:
             'away_draws': 0,
             'away_losses': 0,
             'form_sequence': [],  # Last 5 matches: W, D, L
-            'goals_scored_by_minute': {
-                '0-15': 0, '16-30': 0, '31-45': 0,
-                '46-60': 0, '61-75': 0, '76-90': 0
-            },
-            'goals_conceded_by_minute': {
-                '0-15': 0, '16-30': 0, '31-45': 0,
-                '46-60': 0, '61-75': 0, '76-90': 0
-            }
+            # Goal counts per 15-minute period, indexed by min(minute // 15, 5); see _MINUTE_PERIODS
+            'goals_scored_by_minute': [0] * len(_MINUTE_PERIODS),
+            'goals_conceded_by_minute': [0] * len(_MINUTE_PERIODS)
         },
         'other_leagues': {
             'games_played': 0,
@@ -81,167 +117,105 @@ def calculate_team_stats(team_id: int, matches: Dict[str, List[Dict]]) -> Dict:
     }
     
     # Process current league matches
-    current_league_matches = sorted(matches['current_league'], 
-                                  key=lambda x: datetime.strptime(x['date'], '%Y-%m-%dT%H:%M:%S%z'))
-    
-    for match in current_league_matches:
-        is_home = match['home_team'] == team_id
-        team_goals = match['home_goals'] if is_home else match['away_goals']
-        opponent_goals = match['away_goals'] if is_home else match['home_goals']
-        
-        # Update basic stats
-        stats['current_league']['games_played'] += 1
-        stats['current_league']['goals_scored'] += team_goals
-        stats['current_league']['goals_conceded'] += opponent_goals
-        
-        # Update home/away specific stats
-        if is_home:
-            stats['current_league']['home_games'] += 1
-            stats['current_league']['home_goals_scored'] += team_goals
-            stats['current_league']['home_goals_conceded'] += opponent_goals
-            
-            if team_goals > opponent_goals:
-                stats['current_league']['home_wins'] += 1
-                stats['current_league']['wins'] += 1
-                stats['current_league']['form_sequence'].append('W')
-            elif team_goals == opponent_goals:
-                stats['current_league']['home_draws'] += 1
-                stats['current_league']['draws'] += 1
-                stats['current_league']['form_sequence'].append('D')
-            else:
-                stats['current_league']['home_losses'] += 1
-                stats['current_league']['losses'] += 1
-                stats['current_league']['form_sequence'].append('L')
-        else:
-            stats['current_league']['away_games'] += 1
-            stats['current_league']['away_goals_scored'] += team_goals
-            stats['current_league']['away_goals_conceded'] += opponent_goals
-            
-            if team_goals > opponent_goals:
-                stats['current_league']['away_wins'] += 1
-                stats['current_league']['wins'] += 1
-                stats['current_league']['form_sequence'].append('W')
-            elif team_goals == opponent_goals:
-                stats['current_league']['away_draws'] += 1
-                stats['current_league']['draws'] += 1
-                stats['current_league']['form_sequence'].append('D')
-            else:
-                stats['current_league']['away_losses'] += 1
-                stats['current_league']['losses'] += 1
-                stats['current_league']['form_sequence'].append('L')
-        
-        # Update clean sheets and failed to score
-        if opponent_goals == 0:
-            stats['current_league']['clean_sheets'] += 1
-        if team_goals == 0:
-            stats['current_league']['failed_to_score'] += 1
+    # API dates are ISO-8601 UTC strings, so they sort chronologically as plain strings
+    current_league_matches = sorted(matches['current_league'], key=itemgetter('date'))
+    
+    # Aggregate with array operations over the team-oriented goals instead of per-match branches
+    is_home, scored, conceded = _match_arrays(current_league_matches, team_id)
+    is_away = ~is_home
+    # Result codes: 1 = win, 0 = draw, -1 = loss; letters are only produced for form_sequence
+    results = np.sign(scored - conceded).astype(np.int8)
+    won = results == 1
+    drawn = results == 0
+    # One bincount gives the home/away split: bins 0-2 are away L/D/W, 3-5 home L/D/W
+    away_losses, away_draws, away_wins, home_losses, home_draws, home_wins = (
+        np.bincount(results + 1 + 3 * is_home, minlength=6).tolist())
+    
+    stats['current_league'].update({
+        'games_played': len(scored),
+        'wins': home_wins + away_wins,
+        'draws': home_draws + away_draws,
+        'losses': home_losses + away_losses,
+        'goals_scored': int(scored.sum()),
+        'goals_conceded': int(conceded.sum()),
+        'clean_sheets': int((conceded == 0).sum()),
+        'failed_to_score': int((scored == 0).sum()),
+        'home_games': int(is_home.sum()),
+        'away_games': int(is_away.sum()),
+        'home_goals_scored': int(scored[is_home].sum()),
+        'away_goals_scored': int(scored[is_away].sum()),
+        'home_goals_conceded': int(conceded[is_home].sum()),
+        'away_goals_conceded': int(conceded[is_away].sum()),
+        'home_wins': home_wins,
+        'home_draws': home_draws,
+        'home_losses': home_losses,
+        'away_wins': away_wins,
+        'away_draws': away_draws,
+        'away_losses': away_losses,
+        'form_sequence': [_RESULT_LETTERS[code + 1] for code in results.tolist()]
+    })
     
     # Process other leagues matches with lower weighting
-    for match in matches['other_leagues']:
-        is_home = match['home_team'] == team_id
-        team_goals = match['home_goals'] if is_home else match['away_goals']
-        opponent_goals = match['away_goals'] if is_home else match['home_goals']
-        
-        stats['other_leagues']['games_played'] += 1
-        stats['other_leagues']['goals_scored'] += team_goals
-        stats['other_leagues']['goals_conceded'] += opponent_goals
-        
-        if team_goals > opponent_goals:
-            stats['other_leagues']['wins'] += 1
-        elif team_goals == opponent_goals:
-            stats['other_leagues']['draws'] += 1
-        else:
-            stats['other_leagues']['losses'] += 1
-            
-        if opponent_goals == 0:
-            stats['other_leagues']['clean_sheets'] += 1
-        if team_goals == 0:
-            stats['other_leagues']['failed_to_score'] += 1
+    _, other_scored, other_conceded = _match_arrays(matches['other_leagues'], team_id)
+    stats['other_leagues'].update({
+        'games_played': len(other_scored),
+        'wins': int((other_scored > other_conceded).sum()),
+        'draws': int((other_scored == other_conceded).sum()),
+        'losses': int((other_scored < other_conceded).sum()),
+        'goals_scored': int(other_scored.sum()),
+        'goals_conceded': int(other_conceded.sum()),
+        'clean_sheets': int((other_conceded == 0).sum()),
+        'failed_to_score': int((other_scored == 0).sum())
+    })
     
     # Calculate recent form (last 8 matches)
-    last_8_matches = current_league_matches[-8:] if len(current_league_matches) >= 8 else current_league_matches
-    
-    stats['recent_form'] = {
-        'last_8_games': [],
-        'goals_scored_last_8': 0,
-        'goals_conceded_last_8': 0,
-        'points_last_8': 0,
-        'form_rating': 0.0,
-        'clean_sheets_last_8': 0,
-        'failed_to_score_last_8': 0
-    }
-    
-    for match in last_8_matches:
-        is_home = match['home_team'] == team_id
-        team_goals = match['home_goals'] if is_home else match['away_goals']
-        opponent_goals = match['away_goals'] if is_home else match['home_goals']
-        
-        stats['recent_form']['goals_scored_last_8'] += team_goals
-        stats['recent_form']['goals_conceded_last_8'] += opponent_goals
-        
-        if opponent_goals == 0:
-            stats['recent_form']['clean_sheets_last_8'] += 1
-        if team_goals == 0:
-            stats['recent_form']['failed_to_score_last_8'] += 1
-        
-        if team_goals > opponent_goals:
-            stats['recent_form']['points_last_8'] += 3
-            stats['recent_form']['last_8_games'].append('W')
-        elif team_goals == opponent_goals:
-            stats['recent_form']['points_last_8'] += 1
-            stats['recent_form']['last_8_games'].append('D')
-        else:
-            stats['recent_form']['last_8_games'].append('L')
+    recent_scored = scored[-8:]
+    recent_conceded = conceded[-8:]
+    stats['recent_form'].update({
+        'last_8_games': stats['current_league']['form_sequence'][-8:],
+        'goals_scored_last_8': int(recent_scored.sum()),
+        'goals_conceded_last_8': int(recent_conceded.sum()),
+        'points_last_8': int(3 * won[-8:].sum() + drawn[-8:].sum()),
+        'clean_sheets_last_8': int((recent_conceded == 0).sum()),
+        'failed_to_score_last_8': int((recent_scored == 0).sum())
+    })
     
     # Calculate form rating (0-100)
-    max_points_possible = len(last_8_matches) * 3
+    max_points_possible = len(recent_scored) * 3
     if max_points_possible > 0:
         stats['recent_form']['form_rating'] = (stats['recent_form']['points_last_8'] / max_points_possible) * 100
     
     # Calculate performance metrics
-    if stats['current_league']['games_played'] > 0:
+    current = stats['current_league']
+    games = current['games_played']
+    if games > 0:
         stats['performance_metrics'] = {
-            'points_per_game': (stats['current_league']['wins'] * 3 + stats['current_league']['draws']) / 
-                              stats['current_league']['games_played'],
-            'goals_scored_per_game': stats['current_league']['goals_scored'] / 
-                                    stats['current_league']['games_played'],
-            'goals_conceded_per_game': stats['current_league']['goals_conceded'] / 
-                                      stats['current_league']['games_played'],
-            'clean_sheet_percentage': (stats['current_league']['clean_sheets'] / 
-                                     stats['current_league']['games_played']) * 100,
-            'win_percentage': (stats['current_league']['wins'] / 
-                             stats['current_league']['games_played']) * 100,
-            'home_win_percentage': (stats['current_league']['home_wins'] / 
-                                  stats['current_league']['home_games']) * 100 
-                                  if stats['current_league']['home_games'] > 0 else 0,
-            'away_win_percentage': (stats['current_league']['away_wins'] / 
-                                  stats['current_league']['away_games']) * 100 
-                                  if stats['current_league']['away_games'] > 0 else 0,
-            'scoring_consistency': (1 - (stats['current_league']['failed_to_score'] / 
-                                      stats['current_league']['games_played'])) * 100,
-            'defensive_stability': (stats['current_league']['clean_sheets'] / 
-                                  stats['current_league']['games_played']) * 100
+            'points_per_game': (current['wins'] * 3 + current['draws']) / games,
+            'goals_scored_per_game': current['goals_scored'] / games,
+            'goals_conceded_per_game': current['goals_conceded'] / games,
+            'clean_sheet_percentage': (current['clean_sheets'] / games) * 100,
+            'win_percentage': (current['wins'] / games) * 100,
+            'home_win_percentage': (current['home_wins'] / current['home_games']) * 100
+                                  if current['home_games'] > 0 else 0,
+            'away_win_percentage': (current['away_wins'] / current['away_games']) * 100
+                                  if current['away_games'] > 0 else 0,
+            'scoring_consistency': (1 - (current['failed_to_score'] / games)) * 100,
+            'defensive_stability': (current['clean_sheets'] / games) * 100
         }
     else:
         # If no current league data, use other leagues data with adjustment
-        other_games = stats['other_leagues']['games_played']
+        other = stats['other_leagues']
+        other_games = other['games_played']
         if other_games > 0:
             adjustment_factor = 0.85  # Reduce strength due to league change
             stats['performance_metrics'] = {
-                'points_per_game': ((stats['other_leagues']['wins'] * 3 + 
-                                   stats['other_leagues']['draws']) / other_games) * adjustment_factor,
-                'goals_scored_per_game': (stats['other_leagues']['goals_scored'] / 
-                                        other_games) * adjustment_factor,
-                'goals_conceded_per_game': (stats['other_leagues']['goals_conceded'] / 
-                                          other_games) / adjustment_factor,
-                'clean_sheet_percentage': (stats['other_leagues']['clean_sheets'] / 
-                                         other_games) * 100 * adjustment_factor,
-                'win_percentage': (stats['other_leagues']['wins'] / other_games) * 
-                                100 * adjustment_factor,
-                'scoring_consistency': (1 - (stats['other_leagues']['failed_to_score'] / 
-                                          other_games)) * 100 * adjustment_factor,
-                'defensive_stability': (stats['other_leagues']['clean_sheets'] / 
-                                      other_games) * 100 * adjustment_factor
+                'points_per_game': ((other['wins'] * 3 + other['draws']) / other_games) * adjustment_factor,
+                'goals_scored_per_game': (other['goals_scored'] / other_games) * adjustment_factor,
+                'goals_conceded_per_game': (other['goals_conceded'] / other_games) / adjustment_factor,
+                'clean_sheet_percentage': (other['clean_sheets'] / other_games) * 100 * adjustment_factor,
+                'win_percentage': (other['wins'] / other_games) * 100 * adjustment_factor,
+                'scoring_consistency': (1 - (other['failed_to_score'] / other_games)) * 100 * adjustment_factor,
+                'defensive_stability': (other['clean_sheets'] / other_games) * 100 * adjustment_factor
             }
         else:
             # No data at all - use league averages
@@ -259,6 +233,59 @@ def calculate_team_stats(team_id: int, matches: Dict[str, List[Dict]]) -> Dict:
     
     return stats
 
+# Outcome probability bounds applied by _outcome_probabilities
+_MAX_HOME_WIN_PROB = 0.75
+_MAX_AWAY_WIN_PROB = 0.65
+_MIN_DRAW_PROB = 0.15
+_MIN_AWAY_WIN_PROB = 0.10
+
+@lru_cache(maxsize=1024)
+def _outcome_probabilities(home_xg: float, away_xg: float) -> Tuple[float, float, float]:
+    """
+    Capped and normalized (home win, draw, away win) probabilities for a pair of expected goals.
+    
+    Depends only on the two xG values, so it is memoized: repeated predictions of the same
+    fixture skip the score matrix and the capping steps entirely.
+    """
+    # Calculate score probabilities as the outer product of the two goal distributions
+    score_probs = np.outer(_poisson_pmf(home_xg), _poisson_pmf(away_xg))
+    
+    # Calculate outcome probabilities
+    home_win_prob = np.tril(score_probs, -1).sum()
+    away_win_prob = np.triu(score_probs, 1).sum()
+    draw_prob = np.trace(score_probs)
+    
+    # Cap maximum probabilities to ensure realistic values
+    if home_win_prob > _MAX_HOME_WIN_PROB:
+        excess = home_win_prob - _MAX_HOME_WIN_PROB
+        home_win_prob = _MAX_HOME_WIN_PROB
+        draw_prob += excess * 0.6
+        away_win_prob += excess * 0.4
+    
+    if away_win_prob > _MAX_AWAY_WIN_PROB:
+        excess = away_win_prob - _MAX_AWAY_WIN_PROB
+        away_win_prob = _MAX_AWAY_WIN_PROB
+        draw_prob += excess * 0.6
+        home_win_prob += excess * 0.4
+    
+    # Ensure minimum probabilities
+    if draw_prob < _MIN_DRAW_PROB:
+        shortage = _MIN_DRAW_PROB - draw_prob
+        draw_prob = _MIN_DRAW_PROB
+        if home_win_prob > away_win_prob:
+            home_win_prob -= shortage
+        else:
+            away_win_prob -= shortage
+    
+    if away_win_prob < _MIN_AWAY_WIN_PROB:
+        shortage = _MIN_AWAY_WIN_PROB - away_win_prob
+        away_win_prob = _MIN_AWAY_WIN_PROB
+        home_win_prob -= shortage
+    
+    # Final normalization
+    total = home_win_prob + away_win_prob + draw_prob
+    return home_win_prob / total, draw_prob / total, away_win_prob / total
+
 def calculate_poisson_probabilities(home_team_stats, away_team_stats, h2h_stats):
     """
     Calculate match outcome probabilities using Poisson distribution.
@@ -342,53 +369,7 @@ def calculate_poisson_probabilities(home_team_stats, away_team_stats, h2h_stats)
         away_xg /= h2h_factor
         print(f"DEBUG: Applied H2H factor: {h2h_factor}, New Home xG: {home_xg}, Away xG: {away_xg}")
     
-    # Calculate score probabilities
-    max_goals = 10
-    score_probs = np.zeros((max_goals + 1, max_goals + 1))
-    
-    for i in range(max_goals + 1):
-        for j in range(max_goals + 1):
-            score_probs[i, j] = poisson.pmf(i, home_xg) * poisson.pmf(j, away_xg)
-    
-    # Calculate outcome probabilities
-    home_win_prob = np.sum(np.tril(score_probs, -1))
-    away_win_prob = np.sum(np.triu(score_probs, 1))
-    draw_prob = np.sum(np.diag(score_probs))
-    
-    print(f"DEBUG: Initial probabilities - Home: {home_win_prob:.4f}, Draw: {draw_prob:.4f}, Away: {away_win_prob:.4f}")
-    
-    # Cap maximum probabilities to ensure realistic values
-    if home_win_prob > 0.75:
-        excess = home_win_prob - 0.75
-        home_win_prob = 0.75
-        draw_prob += excess * 0.6
-        away_win_prob += excess * 0.4
-    
-    if away_win_prob > 0.65:
-        excess = away_win_prob - 0.65
-        away_win_prob = 0.65
-        draw_prob += excess * 0.6
-        home_win_prob += excess * 0.4
-    
-    # Ensure minimum probabilities
-    if draw_prob < 0.15:
-        shortage = 0.15 - draw_prob
-        draw_prob = 0.15
-        if home_win_prob > away_win_prob:
-            home_win_prob -= shortage
-        else:
-            away_win_prob -= shortage
-    
-    if away_win_prob < 0.10:
-        shortage = 0.10 - away_win_prob
-        away_win_prob = 0.10
-        home_win_prob -= shortage
-    
-    # Final normalization
-    total = home_win_prob + away_win_prob + draw_prob
-    home_win_prob /= total
-    away_win_prob /= total
-    draw_prob /= total
+    home_win_prob, draw_prob, away_win_prob = _outcome_probabilities(home_xg, away_xg)
     
     print(f"DEBUG: Final probabilities - Home: {home_win_prob:.4f}, Draw: {draw_prob:.4f}, Away: {away_win_prob:.4f}")
     
@@ -405,6 +386,14 @@ def calculate_poisson_probabilities(home_team_stats, away_team_stats, h2h_stats)
         }
     }
 
+def _std(xs: List[float]) -> float:
+    """Population standard deviation in plain Python; cheaper than np.std for a handful of values."""
+    mean = sum(xs) / len(xs)
+    return (sum((x - mean) ** 2 for x in xs) / len(xs)) ** 0.5
+
+# Per-match weights for calculate_form_factor, applied to the last 8 matches in list order
+_FORM_WEIGHTS = np.array([1.3, 1.25, 1.2, 1.15, 1.1, 1.05, 1.0, 0.95])
+
 def calculate_form_factor(recent_matches: List[Dict], team_id: int) -> Dict:
     """
     Calculate team's form based on last 8 matches with enhanced analysis.
@@ -422,58 +411,31 @@ def calculate_form_factor(recent_matches: List[Dict], team_id: int) -> Dict:
     last_8 = recent_matches[-8:] if len(recent_matches) >= 8 else recent_matches
     num_matches = len(last_8)
     
-    # Initialize counters
-    points = 0
-    goals_scored = 0
-    goals_conceded = 0
-    wins = 0
-    draws = 0
-    losses = 0
-    clean_sheets = 0
-    failed_to_score = 0
-    
     # Weight more recent matches higher (less extreme decay)
-    weights = [1.3, 1.25, 1.2, 1.15, 1.1, 1.05, 1.0, 0.95][:num_matches]
-    total_weight = sum(weights)
-    
-    # Track match-by-match performance
-    performance_trend = []
-    goal_differences = []
-    
-    for match, weight in zip(last_8, weights):
-        is_home = match['home_team'] == team_id
-        team_goals = match['home_goals'] if is_home else match['away_goals']
-        opponent_goals = match['away_goals'] if is_home else match['home_goals']
-        
-        # Calculate match performance (0-100)
-        goal_diff = team_goals - opponent_goals
-        goal_differences.append(goal_diff)
-        
-        match_performance = 50  # Base performance
-        if team_goals > opponent_goals:
-            match_performance = 75 + min(goal_diff * 3, 15)  # Win bonus (capped)
-            points += 3 * weight
-            wins += 1
-        elif team_goals == opponent_goals:
-            match_performance = 60  # Draw is still positive
-            points += 1 * weight
-            draws += 1
-        else:
-            match_performance = 40 + max(goal_diff * 3, -30)  # Loss penalty (capped)
-            losses += 1
-        
-        performance_trend.append(match_performance)
-        
-        # Track goals
-        goals_scored += team_goals * weight
-        goals_conceded += opponent_goals * weight
-        
-        if opponent_goals == 0:
-            clean_sheets += 1
-            match_performance += 5  # Clean sheet bonus
-        if team_goals == 0:
-            failed_to_score += 1
-            match_performance -= 5  # Failed to score penalty
+    weights = _FORM_WEIGHTS[:num_matches]
+    total_weight = float(weights.sum())
+    
+    _, team_goals, opponent_goals = _match_arrays(last_8, team_id)
+    goal_diff = team_goals - opponent_goals
+    won = goal_diff > 0
+    drawn = goal_diff == 0
+    
+    # Match-by-match performance (0-100): win bonus and loss penalty are capped, a draw is still positive
+    performance = np.where(won, 75 + np.minimum(goal_diff * 3, 15),
+                           np.where(drawn, 60, 40 + np.maximum(goal_diff * 3, -30)))
+    performance_trend = performance.tolist()
+    goal_differences = goal_diff.tolist()
+    
+    points = float(3 * weights[won].sum() + weights[drawn].sum())
+    wins = int(won.sum())
+    draws = int(drawn.sum())
+    losses = num_matches - wins - draws
+    clean_sheets = int((opponent_goals == 0).sum())
+    failed_to_score = int((team_goals == 0).sum())
+    
+    # Track goals
+    goals_scored = float(team_goals @ weights)
+    goals_conceded = float(opponent_goals @ weights)
     
     # Calculate weighted averages
     weighted_points = points / total_weight
@@ -485,39 +447,29 @@ def calculate_form_factor(recent_matches: List[Dict], team_id: int) -> Dict:
     goals_conceded_avg = goals_conceded / total_weight
     
     # Calculate performance consistency
-    performance_std = np.std(performance_trend) if len(performance_trend) > 1 else 0
+    performance_std = _std(performance_trend) if len(performance_trend) > 1 else 0
     consistency_rating = max(0, 100 - (performance_std / 2))
     
     # Calculate momentum (based on last 3 matches vs previous 3)
-    recent_perf = np.mean(performance_trend[-3:]) if len(performance_trend) >= 3 else np.mean(performance_trend)
-    earlier_perf = np.mean(performance_trend[:-3]) if len(performance_trend) >= 6 else np.mean(performance_trend)
+    recent = performance_trend[-3:] if len(performance_trend) >= 3 else performance_trend
+    earlier = performance_trend[:-3] if len(performance_trend) >= 6 else performance_trend
+    recent_perf = sum(recent) / len(recent)
+    earlier_perf = sum(earlier) / len(earlier)
     momentum = recent_perf - earlier_perf
     
     # Determine form factor (centered around 1.0 with narrower range)
-    base_form = 0.8 + (form_rating / 100) * 0.4  # 0.8 to 1.2
-    momentum_adj = max(-0.1, min(0.1, momentum / 200))  # -0.1 to +0.1
-    consistency_adj = (consistency_rating / 100) * 0.1  # 0 to 0.1
-    form_factor = base_form + momentum_adj + consistency_adj  # Range: 0.7 to 1.4
-    
-    # Analyze trends
-    first_half = last_8[:num_matches//2]
-    second_half = last_8[num_matches//2:]
+    # Base 0.8 to 1.2 from the rating, momentum -0.1 to +0.1, consistency 0 to 0.1; range 0.7 to 1.4
+    form_factor = (0.8 + form_rating * 0.004
+                   + max(-0.1, min(0.1, momentum * 0.005))
+                   + consistency_rating * 0.001)
     
-    first_half_goals = sum(m['home_goals'] if m['home_team'] == team_id else m['away_goals'] for m in first_half)
-    second_half_goals = sum(m['home_goals'] if m['home_team'] == team_id else m['away_goals'] for m in second_half)
-    
-    first_half_points = sum(3 if (m['home_team'] == team_id and m['home_goals'] > m['away_goals']) or 
-                              (m['away_team'] == team_id and m['away_goals'] > m['home_goals'])
-                           else 1 if m['home_goals'] == m['away_goals'] else 0 
-                           for m in first_half)
-    
-    second_half_points = sum(3 if (m['home_team'] == team_id and m['home_goals'] > m['away_goals']) or 
-                               (m['away_team'] == team_id and m['away_goals'] > m['home_goals'])
-                            else 1 if m['home_goals'] == m['away_goals'] else 0 
-                            for m in second_half)
+    # Analyze trends: compare the two halves using the already oriented goals and results
+    half = num_matches // 2
+    match_points = 3 * won + drawn
+    point_diff = int(match_points[half:].sum() - match_points[:half].sum())
+    goals_diff = int(team_goals[half:].sum() - team_goals[:half].sum())
     
     # More nuanced trend analysis
-    point_diff = second_half_points - first_half_points
     if point_diff > 3:
         trend = 'strongly_improving'
     elif point_diff > 0:
@@ -529,7 +481,6 @@ def calculate_form_factor(recent_matches: List[Dict], team_id: int) -> Dict:
     else:
         trend = 'stable'
     
-    goals_diff = second_half_goals - first_half_goals
     if goals_diff > 2:
         goals_trend = 'strongly_improving'
     elif goals_diff > 0:
@@ -590,102 +541,84 @@ def analyze_head_to_head(h2h_matches: List[Dict], team1_id: int, team2_id: int)
             'matches_analyzed': 0
         }
     
-    # Initialize counters
+    # Orient every meeting to team1 once
+    team1_home, team1_goals, team2_goals = _match_arrays(h2h_matches, team1_id)
+    goal_diff = team1_goals - team2_goals
+    
     stats = {
-        'team1_wins': 0,
-        'team2_wins': 0,
-        'draws': 0,
-        'team1_goals': 0,
-        'team2_goals': 0,
-        'total_matches': len(h2h_matches),
-        'recent_matches': []
+        'team1_wins': int((goal_diff > 0).sum()),
+        'team2_wins': int((goal_diff < 0).sum()),
+        'draws': int((goal_diff == 0).sum()),
+        'team1_goals': int(team1_goals.sum()),
+        'team2_goals': int(team2_goals.sum()),
+        'total_matches': len(h2h_matches)
     }
     
-    # Weight more recent matches higher
-    max_weight = 2.0
-    weight_decay = 0.8
-    current_weight = max_weight
-    total_weight = 0
-    weighted_goal_diff = 0
-    
-    # Track performance trends
-    goal_differences = []
-    match_dominance = []  # Track which team was more dominant in each match
-    
-    for match in h2h_matches:
-        team1_home = match['home_team'] == team1_id
-        team1_goals = match['home_goals'] if team1_home else match['away_goals']
-        team2_goals = match['away_goals'] if team1_home else match['home_goals']
-        
-        # Update basic stats
-        stats['team1_goals'] += team1_goals
-        stats['team2_goals'] += team2_goals
-        
-        if team1_goals > team2_goals:
-            stats['team1_wins'] += 1
-        elif team2_goals > team1_goals:
-            stats['team2_wins'] += 1
-        else:
-            stats['draws'] += 1
-        
-        # Calculate weighted goal difference
-        goal_diff = team1_goals - team2_goals
-        weighted_goal_diff += goal_diff * current_weight
-        total_weight += current_weight
-        
-        # Track goal differences for consistency analysis
-        goal_differences.append(goal_diff)
-        
-        # Calculate match dominance (-1 to 1, positive means team1 dominated)
-        dominance = goal_diff / max(3, abs(goal_diff))  # Cap at ±3 goals
-        match_dominance.append(dominance)
-        
-        # Store recent match info
-        stats['recent_matches'].append({
+    # Weight more recent matches higher: 2.0 for the first listed match, decaying by 0.8 per match
+    weights = 2.0 * 0.8 ** np.arange(len(h2h_matches))
+    total_weight = weights.sum()
+    weighted_goal_diff = goal_diff @ weights
+    
+    # Match dominance (-1 to 1, positive means team1 dominated), capped at ±3 goals
+    match_dominance = (goal_diff / np.maximum(3, np.abs(goal_diff))).tolist()
+    
+    stats['recent_matches'] = [
+        {
             'date': match['date'],
-            'team1_goals': team1_goals,
-            'team2_goals': team2_goals,
-            'venue': 'home' if team1_home else 'away',
-            'goal_difference': goal_diff,
+            'team1_goals': t1_goals,
+            'team2_goals': t2_goals,
+            'venue': 'home' if is_home else 'away',
+            'goal_difference': diff,
             'dominance': dominance
-        })
-        
-        # Decay weight for older matches
-        current_weight *= weight_decay
+        }
+        for match, is_home, t1_goals, t2_goals, diff, dominance in zip(
+            h2h_matches, team1_home.tolist(), team1_goals.tolist(), team2_goals.tolist(),
+            goal_diff.tolist(), match_dominance)
+    ]
     
     # Calculate averages and trends
-    stats['avg_team1_goals'] = stats['team1_goals'] / stats['total_matches']
-    stats['avg_team2_goals'] = stats['team2_goals'] / stats['total_matches']
+    total_matches = stats['total_matches']
+    team1_wins, team2_wins, draws = stats['team1_wins'], stats['team2_wins'], stats['draws']
+    avg_team1_goals = stats['team1_goals'] / total_matches
+    avg_team2_goals = stats['team2_goals'] / total_matches
     
     # Calculate weighted dominance
     weighted_dominance = weighted_goal_diff / total_weight if total_weight > 0 else 0
     
     # Calculate consistency in results
-    goal_diff_std = np.std(goal_differences) if len(goal_differences) > 1 else 1.0
+    goal_diff_std = goal_diff.std() if len(goal_diff) > 1 else 1.0
     result_consistency = max(0, 100 - (goal_diff_std * 20))
     
     # Calculate recent form (last 3 matches vs all matches)
-    recent_dominance = np.mean(match_dominance[-3:]) if len(match_dominance) >= 3 else np.mean(match_dominance)
+    recent = match_dominance[-3:]  # At most 3 values, so plain sums beat np.mean
+    recent_dominance = sum(recent) / len(recent)
     overall_dominance = team1_wins / total_matches if total_matches > 0 else 0.5
     weighted_dominance = (recent_dominance * 0.6) + (overall_dominance * 0.4)
     
     # Calculate venue advantage
-    home_matches = [match for match in h2h_matches if match['home_team'] == home_team_id]
-    home_wins = sum(1 for match in home_matches if match['home_goals'] > match['away_goals'])
-    venue_advantage = (home_wins / len(home_matches)) * 2 if home_matches else 1.0
+    home_matches = int(team1_home.sum())
+    home_wins = int((team1_home & (goal_diff > 0)).sum())
+    venue_advantage = (home_wins / home_matches) * 2 if home_matches else 1.0
     
     # Calculate result consistency
     if total_matches >= 3:
-        results = [(match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                  (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals'])
-                  for match in h2h_matches[-3:]]
-        consistency = sum(1 for i in range(len(results)-1) if results[i] == results[i+1]) / (len(results)-1)
+        results = goal_diff[-3:] > 0  # team1 won
+        consistency = int((results[1:] == results[:-1]).sum()) / (len(results) - 1)
     else:
         consistency = 0.5
     
     # Calculate h2h factor
     h2h_factor = (weighted_dominance * 0.4 + venue_advantage * 0.4 + consistency * 0.2) * 1.5
     
+    # Trends over the last 5 meetings, built in one pass over the already-oriented records
+    trend_goal_diffs, trend_dominance, trend_records = [], [], []
+    for record in stats['recent_matches'][-5:]:
+        diff = record['goal_difference']
+        dominance = 1 if diff > 0 else 0 if diff < 0 else 0.5
+        trend_goal_diffs.append(diff)
+        trend_dominance.append(dominance)
+        trend_records.append({**record, 'dominance': dominance})
+    
     h2h_stats = {
         'h2h_factor': h2h_factor,
         'stats': {
@@ -704,45 +637,30 @@ def analyze_head_to_head(h2h_matches: List[Dict], team1_id: int, team2_id: int)
             'venue_advantage': venue_advantage
         },
         'trends': {
-            'goal_differences': [
-                match['home_goals'] - match['away_goals'] 
-                if match['home_team'] == home_team_id
-                else match['away_goals'] - match['home_goals']
-                for match in h2h_matches[-5:]
-            ],
-            'match_dominance': [
-                1 if (match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                     (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals'])
-                else 0 if match['home_goals'] != match['away_goals']
-                else 0.5
-                for match in h2h_matches[-5:]
-            ],
-            'recent_matches': [
-                {
-                    'date': match['date'],
-                    'team1_goals': match['home_goals'] if match['home_team'] == home_team_id else match['away_goals'],
-                    'team2_goals': match['away_goals'] if match['home_team'] == home_team_id else match['home_goals'],
-                    'venue': 'home' if match['home_team'] == home_team_id else 'away',
-                    'goal_difference': match['home_goals'] - match['away_goals'] 
-                        if match['home_team'] == home_team_id
-                        else match['away_goals'] - match['home_goals'],
-                    'dominance': 1 if (match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                                    (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals'])
-                                else 0 if match['home_goals'] != match['away_goals']
-                                else 0.5
-                }
-                for match in h2h_matches[-5:]
-            ]
+            'goal_differences': trend_goal_diffs,
+            'match_dominance': trend_dominance,
+            'recent_matches': trend_records
         },
         'confidence': 'high' if total_matches >= 5 else 'medium' if total_matches >= 3 else 'low',
         'matches_analyzed': total_matches
     } 
     
     # Cache the h2h stats
-    cache.set('h2h_stats', cache_params, h2h_stats)
+    cache.set('h2h_stats', {'team1_id': team1_id, 'team2_id': team2_id}, h2h_stats)
     
     return h2h_stats
 
+# Fallbacks for performance metrics missing from a team's stats in calculate_team_strength_index
+_METRIC_DEFAULTS = {
+    'goals_scored_per_game': 1.5,
+    'scoring_consistency': 70,
+    'home_win_percentage': 40,
+    'away_win_percentage': 26,
+    'goals_conceded_per_game': 1.5,
+    'clean_sheet_percentage': 30,
+    'defensive_stability': 30
+}
+
 def calculate_team_strength_index(team_stats: Dict) -> Dict:
     """
     Calculate overall team strength index based on various statistics.
@@ -766,35 +684,32 @@ def calculate_team_strength_index(team_stats: Dict) -> Dict:
     defense_components = {}
     form_components = {}
     
-    # Calculate attacking strength components
+    # Calculate attacking and defensive strength components
     if 'performance_metrics' in team_stats:
-        metrics = team_stats['performance_metrics']
+        # Missing metrics fall back to league-average defaults, merged in one step
+        metrics = {**_METRIC_DEFAULTS, **team_stats['performance_metrics']}
         
         # Scoring ability (0-2 scale centered at 1.0)
-        goals_per_game = metrics.get('goals_scored_per_game', 1.5)
+        goals_per_game = metrics['goals_scored_per_game']
         attack_components['scoring_rate'] = min(2.0, goals_per_game / 1.5)
         
         # Scoring consistency (0-1 scale)
-        attack_components['consistency'] = metrics.get('scoring_consistency', 70) / 100
+        attack_components['consistency'] = metrics['scoring_consistency'] / 100
         
         # Home/Away attacking balance
-        home_strength = metrics.get('home_win_percentage', 40) / 100
-        away_strength = metrics.get('away_win_percentage', 26) / 100
+        home_strength = metrics['home_win_percentage'] / 100
+        away_strength = metrics['away_win_percentage'] / 100
         attack_components['venue_balance'] = (home_strength + away_strength) / 2
-    
-    # Calculate defensive strength components
-    if 'performance_metrics' in team_stats:
-        metrics = team_stats['performance_metrics']
         
         # Defensive solidity (inverse of goals conceded, 0-2 scale centered at 1.0)
-        goals_conceded = metrics.get('goals_conceded_per_game', 1.5)
+        goals_conceded = metrics['goals_conceded_per_game']
         defense_components['defensive_solidity'] = min(2.0, 1.5 / max(0.5, goals_conceded))
         
         # Clean sheet ratio
-        defense_components['clean_sheet_ratio'] = metrics.get('clean_sheet_percentage', 30) / 100
+        defense_components['clean_sheet_ratio'] = metrics['clean_sheet_percentage'] / 100
         
         # Defensive stability
-        defense_components['stability'] = metrics.get('defensive_stability', 30) / 100
+        defense_components['stability'] = metrics['defensive_stability'] / 100
     
     # Calculate form components
     if 'recent_form' in team_stats:
@@ -858,13 +773,13 @@ def calculate_team_strength_index(team_stats: Dict) -> Dict:
     
     # Calculate strength variability
     if 'recent_form' in team_stats and 'performance_metrics' in team_stats:
-        recent_variance = np.std([
+        recent_variance = _std([
             form_components.get('recent_points', 0.5),
             form_components.get('recent_attack', 0.5),
             form_components.get('recent_defense', 0.5)
         ])
         
-        season_variance = np.std([
+        season_variance = _std([
             attack_components.get('scoring_rate', 1.0) - 1,
             attack_components.get('consistency', 0.5),
             defense_components.get('defensive_solidity', 1.0) - 1,
@@ -893,6 +808,13 @@ def calculate_team_strength_index(team_stats: Dict) -> Dict:
         'confidence': confidence
     }
 
+# Share of a match's estimated cards falling in each period of _MINUTE_PERIODS
+_CARD_PERIOD_SHARES = np.array([0.2, 0.2, 0.3, 0.3, 0.4, 0.4])
+
+def _estimate_yellows(team_goals: np.ndarray, opponent_goals: np.ndarray) -> np.ndarray:
+    """Estimated yellow cards per match: 2 on average, more in losses and high-scoring games."""
+    return 2 + (team_goals < opponent_goals) + 0.5 * (team_goals + opponent_goals >= 4)
+
 def analyze_cards(team_id: int, matches: List[Dict], h2h_matches: List[Dict] = None) -> Dict:
     """
     Analyze card patterns for a team based on recent matches and head-to-head history.
@@ -910,11 +832,7 @@ def analyze_cards(team_id: int, matches: List[Dict], h2h_matches: List[Dict] = N
             'yellow_cards': 0,
             'red_cards': 0,
             'matches_analyzed': 0,
-            'yellow_per_game': 0,
-            'cards_by_minute': {
-                '0-15': 0, '16-30': 0, '31-45': 0,
-                '46-60': 0, '61-75': 0, '76-90': 0
-            }
+            'yellow_per_game': 0
         },
         'h2h_cards': {
             'yellow_cards': 0,
@@ -930,39 +848,14 @@ def analyze_cards(team_id: int, matches: List[Dict], h2h_matches: List[Dict] = N
     recent_matches = matches[-8:] if len(matches) >= 8 else matches
     card_stats['last_8_matches']['matches_analyzed'] = len(recent_matches)
     
-    first_half_yellows = 0
-    second_half_yellows = 0
-    
     # Since we don't have detailed card data, we'll use estimated values
-    estimated_cards_per_match = 2  # Average cards per match
-    for match in recent_matches:
-        # Estimate cards based on match result and venue
-        is_home = match['home_team'] == team_id
-        opponent_goals = match['away_goals'] if is_home else match['home_goals']
-        team_goals = match['home_goals'] if is_home else match['away_goals']
-        
-        # More cards likely in losses or high-scoring games
-        estimated_yellows = estimated_cards_per_match
-        if team_goals < opponent_goals:
-            estimated_yellows += 1
-        if team_goals + opponent_goals >= 4:
-            estimated_yellows += 0.5
-            
-        card_stats['last_8_matches']['yellow_cards'] += estimated_yellows
-        
-        # Distribute cards across periods (more likely in second half)
-        for period in ['61-75', '76-90']:
-            if estimated_yellows > 0:
-                card_stats['last_8_matches']['cards_by_minute'][period] += 0.4
-                estimated_yellows -= 0.4
-        for period in ['31-45', '46-60']:
-            if estimated_yellows > 0:
-                card_stats['last_8_matches']['cards_by_minute'][period] += 0.3
-                estimated_yellows -= 0.3
-        for period in ['0-15', '16-30']:
-            if estimated_yellows > 0:
-                card_stats['last_8_matches']['cards_by_minute'][period] += 0.2
-                estimated_yellows -= 0.2
+    _, team_goals, opponent_goals = _match_arrays(recent_matches, team_id)
+    estimated_yellows = _estimate_yellows(team_goals, opponent_goals)
+    card_stats['last_8_matches']['yellow_cards'] = float(estimated_yellows.sum())
+    
+    # Distribute cards across periods (more likely in second half); every estimate covers the full split
+    period_cards = _CARD_PERIOD_SHARES * len(recent_matches)
+    card_stats['last_8_matches']['cards_by_minute'] = dict(zip(_MINUTE_PERIODS, period_cards.tolist()))
     
     # Calculate averages and trends
     if card_stats['last_8_matches']['matches_analyzed'] > 0:
@@ -973,27 +866,17 @@ def analyze_cards(team_id: int, matches: List[Dict], h2h_matches: List[Dict] = N
         
         # Identify high-risk periods
         avg_cards_per_period = card_stats['last_8_matches']['yellow_cards'] / 6
-        for period, count in card_stats['last_8_matches']['cards_by_minute'].items():
-            if count >= avg_cards_per_period * 1.5:
-                card_stats['high_risk_periods'].append(period)
+        card_stats['high_risk_periods'] = [
+            _MINUTE_PERIODS[i] for i in np.flatnonzero(period_cards >= avg_cards_per_period * 1.5)
+        ]
     
     # Analyze head-to-head cards if available
     if h2h_matches:
         card_stats['h2h_cards']['matches_analyzed'] = len(h2h_matches)
         
-        for match in h2h_matches:
-            # Use the same estimation logic for h2h matches
-            is_home = match['home_team'] == team_id
-            opponent_goals = match['away_goals'] if is_home else match['home_goals']
-            team_goals = match['home_goals'] if is_home else match['away_goals']
-            
-            estimated_yellows = estimated_cards_per_match
-            if team_goals < opponent_goals:
-                estimated_yellows += 1
-            if team_goals + opponent_goals >= 4:
-                estimated_yellows += 0.5
-                
-            card_stats['h2h_cards']['yellow_cards'] += estimated_yellows
+        # Use the same estimation logic for h2h matches
+        _, h2h_team_goals, h2h_opponent_goals = _match_arrays(h2h_matches, team_id)
+        card_stats['h2h_cards']['yellow_cards'] = float(_estimate_yellows(h2h_team_goals, h2h_opponent_goals).sum())
         
         if card_stats['h2h_cards']['matches_analyzed'] > 0:
             card_stats['h2h_cards']['yellow_per_game'] = (
@@ -1003,16 +886,9 @@ def analyze_cards(team_id: int, matches: List[Dict], h2h_matches: List[Dict] = N
     
     # Determine card trend based on recent vs earlier matches
     if card_stats['last_8_matches']['matches_analyzed'] >= 4:
-        recent_4_matches = matches[-4:]
-        earlier_4_matches = matches[-8:-4]
-        
-        recent_yellows = sum(2 if m['home_team'] == team_id and m['home_goals'] < m['away_goals'] or
-                           m['away_team'] == team_id and m['away_goals'] < m['home_goals']
-                           else 1.5 for m in recent_4_matches)
-        
-        earlier_yellows = sum(2 if m['home_team'] == team_id and m['home_goals'] < m['away_goals'] or
-                            m['away_team'] == team_id and m['away_goals'] < m['home_goals']
-                            else 1.5 for m in earlier_4_matches)
+        # Compare the last 4 estimates with the (up to 4) before them, using the same estimates as above
+        recent_yellows = estimated_yellows[-4:].sum()
+        earlier_yellows = estimated_yellows[:-4].sum()
         
         if recent_yellows > earlier_yellows * 1.3:
             card_stats['card_trend'] = 'increasing'
@@ -1021,6 +897,13 @@ def analyze_cards(team_id: int, matches: List[Dict], h2h_matches: List[Dict] = N
     
     return card_stats
 
+# Ordinal rank of confidence labels; unknown labels count as 'low'
+_CONFIDENCE_RANKS = {'low': 0, 'medium': 1, 'high': 2}
+
+def _confidence_rank(level: str) -> int:
+    """Sort key ordering confidence labels from least to most confident."""
+    return _CONFIDENCE_RANKS.get(level, 0)
+
 def predict_match(home_team_id: int, away_team_id: int, league_id: int) -> Dict:
     """
     Predict the outcome of a match between two teams.
@@ -1029,31 +912,42 @@ def predict_match(home_team_id: int, away_team_id: int, league_id: int) -> Dict:
     try:
         print(f"DEBUG: predict_match called for {home_team_id} vs {away_team_id} in league {league_id}")
         
-        # Get team statistics with error handling
+        # Get team statistics with error handling; batch callers have already prefetched them
         home_team_stats = get_team_statistics(home_team_id, league_id)
+        away_team_stats = get_team_statistics(away_team_id, league_id)
         print(f"DEBUG: Got home team stats, available: {home_team_stats.get('available', False)}")
         if not home_team_stats.get('available', False):
             print(f"DEBUG: Home team stats not available for {home_team_id}, using defaults")
             home_team_stats = create_default_stats()
             
-        away_team_stats = get_team_statistics(away_team_id, league_id)
         print(f"DEBUG: Got away team stats, available: {away_team_stats.get('available', False)}")
         if not away_team_stats.get('available', False):
             print(f"DEBUG: Away team stats not available for {away_team_id}, using defaults")
             away_team_stats = create_default_stats()
         
-        # Calculate team strengths
+        # With no statistics for either side the model has nothing to work with
+        if not home_team_stats['available'] and not away_team_stats['available']:
+            print(f"DEBUG: No stats for either team, skipping the model")
+            return create_fallback_prediction()
+        
+        # Calculate team strengths; get_team_statistics already caches the index with the stats,
+        # so this only runs for default stats. Never write to the shared cached dict itself.
         print(f"DEBUG: Calculating team strength indices")
-        home_team_stats['strength'] = calculate_team_strength_index(home_team_stats)
-        away_team_stats['strength'] = calculate_team_strength_index(away_team_stats)
+        if 'strength' not in home_team_stats:
+            home_team_stats = {**home_team_stats, 'strength': calculate_team_strength_index(home_team_stats)}
+        if 'strength' not in away_team_stats:
+            away_team_stats = {**away_team_stats, 'strength': calculate_team_strength_index(away_team_stats)}
         
-        # Get h2h stats with timeout protection
-        try:
-            print(f"DEBUG: Getting head-to-head statistics")
-            h2h_stats = get_h2h_statistics(home_team_id, away_team_id)
-        except Exception as e:
-            print(f"DEBUG: H2H stats unavailable: {str(e)}")
+        # Get h2h stats with timeout protection; not worth a request when one side has no stats
+        if not (home_team_stats['available'] and away_team_stats['available']):
             h2h_stats = {'h2h_factor': 1.0}
+        else:
+            try:
+                print(f"DEBUG: Getting head-to-head statistics")
+                h2h_stats = get_h2h_statistics(home_team_id, away_team_id)
+            except Exception as e:
+                print(f"DEBUG: H2H stats unavailable: {str(e)}")
+                h2h_stats = {'h2h_factor': 1.0}
         
         # Calculate probabilities using Poisson distribution
         print(f"DEBUG: Calculating Poisson probabilities")
@@ -1092,7 +986,7 @@ def predict_match(home_team_id: int, away_team_id: int, league_id: int) -> Dict:
         
         # Add metadata
         prediction['metadata'] = {
-            'confidence': min(home_confidence, away_confidence),
+            'confidence': min(home_confidence, away_confidence, key=_confidence_rank),
             'home_games_analyzed': home_games,
             'away_games_analyzed': away_games
         }
@@ -1123,13 +1017,8 @@ def predict_match(home_team_id: int, away_team_id: int, league_id: int) -> Dict:
         # Calculate cards prediction
         try:
             print(f"DEBUG: Calculating cards prediction")
-            home_cards = analyze_cards(home_team_id, 
-                                     home_team_stats.get('matches', []),
-                                     h2h_stats.get('matches', []))
-            away_cards = analyze_cards(away_team_id,
-                                     away_team_stats.get('matches', []),
-                                     h2h_stats.get('matches', []))
-            
+            # The card lines depend only on the expected goals; per-team analyze_cards
+            # results were never used here, so the h2h list is not scanned at all
             base_cards = 3.5
             intensity_factor = 1.0
             
@@ -1141,13 +1030,14 @@ def predict_match(home_team_id: int, away_team_id: int, league_id: int) -> Dict:
             
             expected_cards = base_cards * intensity_factor
             
+            card_tail = 1 - np.cumsum(_poisson_pmf(expected_cards))  # P(more than k cards)
             prediction['cards'] = {
                 'total': float(expected_cards),
                 'home': float(expected_cards * 0.45),
                 'away': float(expected_cards * 0.55),
-                'over_2.5': float(1 - poisson.cdf(2, expected_cards)),
-                'over_3.5': float(1 - poisson.cdf(3, expected_cards)),
-                'over_4.5': float(1 - poisson.cdf(4, expected_cards))
+                'over_2.5': float(card_tail[2]),
+                'over_3.5': float(card_tail[3]),
+                'over_4.5': float(card_tail[4])
             }
         except Exception as e:
             print(f"DEBUG: Cards prediction unavailable: {str(e)}")
@@ -1216,30 +1106,17 @@ def create_fallback_prediction():
 def calculate_exact_score_probabilities(home_expected: float, away_expected: float) -> Dict[str, float]:
     """Calculate probabilities for exact scorelines."""
     max_goals = 4
-    probabilities = {}
+    grid = np.outer(_poisson_pmf(home_expected)[:max_goals + 1], _poisson_pmf(away_expected)[:max_goals + 1])
     
-    for i in range(max_goals + 1):
-        for j in range(max_goals + 1):
-            prob = poisson.pmf(i, home_expected) * poisson.pmf(j, away_expected)
-            probabilities[f"{i}-{j}"] = prob
-    
-    return dict(sorted(probabilities.items(), key=lambda x: x[1], reverse=True)[:5])
-
-def calculate_under_probability(expected_goals: float, threshold: float) -> float:
-    """Calculate probability of total goals being under a threshold."""
-    prob = 0
-    for i in range(int(threshold)):
-        prob += poisson.pmf(i, expected_goals)
-    return prob
-
-def calculate_over_probability(expected_goals: float, threshold: float) -> float:
-    """Calculate probability of total goals being over a threshold."""
-    return 1 - calculate_under_probability(expected_goals, threshold + 0.1)
+    # Five most likely scorelines; the stable sort keeps ties in home-goals-then-away-goals order
+    top = np.argsort(-grid, axis=None, kind='stable')[:5]
+    rows, cols = np.divmod(top, max_goals + 1)
+    return {f"{i}-{j}": float(grid[i, j]) for i, j in zip(rows.tolist(), cols.tolist())}
 
 def calculate_btts_probability(home_expected: float, away_expected: float) -> float:
     """Calculate both teams to score probability."""
-    no_home_goals = poisson.pmf(0, home_expected)
-    no_away_goals = poisson.pmf(0, away_expected)
+    no_home_goals = _poisson_pmf(home_expected)[0]
+    no_away_goals = _poisson_pmf(away_expected)[0]
     return (1 - no_home_goals) * (1 - no_away_goals)
 
 def calculate_volatility(home_team_stats: Dict, away_team_stats: Dict) -> float:
@@ -1262,35 +1139,32 @@ def calculate_volatility(home_team_stats: Dict, away_team_stats: Dict) -> float:
     
     return max(0.1, min(1.0, volatility))  # Ensure result is between 0.1 and 1.0
 
+# Win bets flagged by identify_value_bets: (type, probability key, cutoff, high-confidence cutoff, reason)
+_WIN_VALUE_BETS = (
+    ('Home Win', 'home_win', 0.6, 0.7, 'Strong home team advantage and form'),
+    ('Away Win', 'away_win', 0.45, 0.55, 'Superior away team strength despite venue disadvantage'),
+)
+
 def identify_value_bets(prediction: Dict) -> List[Dict]:
     """
     Identify potential value bets based on prediction.
     """
-    value_bets = []
-    
-    # Get probabilities and expected goals
-    home_win_prob = prediction['probabilities']['home_win']
-    away_win_prob = prediction['probabilities']['away_win']
-    draw_prob = prediction['probabilities']['draw']
-    home_xg = prediction['expected_goals']['home']
-    away_xg = prediction['expected_goals']['away']
+    probabilities = prediction['probabilities']
+    home_win_prob = probabilities['home_win']
+    away_win_prob = probabilities['away_win']
+    draw_prob = probabilities['draw']
     total_xg = prediction['expected_goals']['total']
     
-    # Check for strong home win probability
-    if home_win_prob > 0.6:
-        value_bets.append({
-            'type': 'Home Win',
-            'confidence': 'high' if home_win_prob > 0.7 else 'medium',
-            'reason': 'Strong home team advantage and form'
-        })
-    
-    # Check for strong away win probability
-    if away_win_prob > 0.45:
-        value_bets.append({
-            'type': 'Away Win',
-            'confidence': 'high' if away_win_prob > 0.55 else 'medium',
-            'reason': 'Superior away team strength despite venue disadvantage'
-        })
+    # Check for strong home/away win probabilities
+    value_bets = [
+        {
+            'type': bet_type,
+            'confidence': 'high' if probabilities[key] > high_cutoff else 'medium',
+            'reason': reason
+        }
+        for bet_type, key, cutoff, high_cutoff, reason in _WIN_VALUE_BETS
+        if probabilities[key] > cutoff
+    ]
     
     # Check for draw probability
     if abs(home_win_prob - away_win_prob) < 0.1 and draw_prob > 0.25:
@@ -1321,15 +1195,17 @@ def calculate_alternative_predictions(home_xg: float, away_xg: float,
     """
     Calculate alternative predictions like exact scores and BTTS.
     """
+    # P(at most k goals in total), read off once for all the goal lines
+    total_cdf = np.cumsum(_poisson_pmf(home_xg + away_xg))
     return {
         'exact_score_probabilities': calculate_exact_score_probabilities(home_xg, away_xg),
         'total_goals_probabilities': {
-            'under_1.5': calculate_under_probability(home_xg + away_xg, 1.5),
-            'under_2.5': calculate_under_probability(home_xg + away_xg, 2.5),
-            'under_3.5': calculate_under_probability(home_xg + away_xg, 3.5),
-            'over_1.5': calculate_over_probability(home_xg + away_xg, 1.5),
-            'over_2.5': calculate_over_probability(home_xg + away_xg, 2.5),
-            'over_3.5': calculate_over_probability(home_xg + away_xg, 3.5)
+            'under_1.5': float(total_cdf[1]),
+            'under_2.5': float(total_cdf[2]),
+            'under_3.5': float(total_cdf[3]),
+            'over_1.5': float(1 - total_cdf[1]),
+            'over_2.5': float(1 - total_cdf[2]),
+            'over_3.5': float(1 - total_cdf[3])
         },
         'both_teams_to_score': calculate_btts_probability(home_xg, away_xg),
         'cards': analyze_cards(home_team_stats, away_team_stats)
@@ -1384,19 +1260,19 @@ def get_historical_matches(team_id: int, league: str, seasons: List[int] = None)
         try:
             if not all(key in match for key in ['fixture', 'teams', 'goals', 'league']):
                 return None
-                
+            
+            home_goals = match['goals'].get('home', 0)
+            away_goals = match['goals'].get('away', 0)
             return {
                 'date': match['fixture'].get('date', '2024-01-01T00:00:00+00:00'),  # Default date if missing
                 'home_team': match['teams'].get('home', {}).get('id'),
                 'away_team': match['teams'].get('away', {}).get('id'),
-                'home_goals': match['goals'].get('home', 0),
-                'away_goals': match['goals'].get('away', 0),
+                'home_goals': home_goals,
+                'away_goals': away_goals,
                 'league': match['league'].get('id'),
                 'season': match['league'].get('season'),
                 'venue': match['fixture'].get('venue', {}).get('name'),
-                'result': 'H' if match['goals'].get('home', 0) > match['goals'].get('away', 0)
-                         else 'D' if match['goals'].get('home', 0) == match['goals'].get('away', 0)
-                         else 'A'
+                'result': 'H' if home_goals > away_goals else 'D' if home_goals == away_goals else 'A'
             }
         except Exception as e:
             matches['metadata']['api_errors'].append(f"Error processing match: {str(e)}")
@@ -1453,10 +1329,8 @@ def get_historical_matches(team_id: int, league: str, seasons: List[int] = None)
     # Sort matches by date
     try:
         for category in ['current_league', 'other_leagues']:
-            matches[category] = sorted(
-                matches[category],
-                key=lambda x: datetime.strptime(x['date'], '%Y-%m-%dT%H:%M:%S%z')
-            )
+            # ISO-8601 UTC dates sort chronologically as strings
+            matches[category].sort(key=itemgetter('date'))
     except Exception as e:
         matches['metadata']['api_errors'].append(f"Error sorting matches: {str(e)}")
         # If date sorting fails, maintain original order
@@ -1478,6 +1352,11 @@ def get_historical_matches(team_id: int, league: str, seasons: List[int] = None)
     
     return matches
 
+def _current_season() -> int:
+    """Start year of the current season, which rolls over in July."""
+    now = datetime.now()
+    return now.year if now.month > 6 else now.year - 1
+
 def get_team_statistics(team_id: int, league: str) -> Dict:
     """
     Fetch current season statistics for a team with caching.
@@ -1491,8 +1370,7 @@ def get_team_statistics(team_id: int, league: str) -> Dict:
     if cached_data:
         return cached_data
     
-    current_year = datetime.now().year
-    season = current_year if datetime.now().month > 6 else current_year - 1
+    season = _current_season()
     
     # Fetch team statistics
     team_stats_data = api_football_request('teams/statistics', {
@@ -1510,100 +1388,120 @@ def get_team_statistics(team_id: int, league: str) -> Dict:
     
     stats = team_stats_data['response']
     
+    # Resolve the shared sub-sections once instead of re-walking them for every field
+    fixtures = stats.get('fixtures', {})
+    played = fixtures.get('played', {})
+    wins = fixtures.get('wins', {})
+    draws = fixtures.get('draws', {})
+    loses = fixtures.get('loses', {})
+    goals = stats.get('goals', {})
+    goals_for = goals.get('for', {})
+    goals_against = goals.get('against', {})
+    goals_for_total = goals_for.get('total', {})
+    goals_against_total = goals_against.get('total', {})
+    clean_sheets = stats.get('clean_sheets', {})
+    failed_to_score = stats.get('failed_to_score', {})
+    penalty = stats.get('penalty', {})
+    cards = stats.get('cards', {})
+    biggest = stats.get('biggest', {})
+    biggest_streak = biggest.get('streak', {})
+    biggest_wins = biggest.get('wins', {})
+    biggest_losses = biggest.get('loses', {})
+    biggest_goals = biggest.get('goals', {})
+    
     # Process and organize statistics
     processed_stats = {
         'available': True,
         'season': season,
         'fixtures': {
-            'played': stats.get('fixtures', {}).get('played', {}).get('total', 0),
-            'wins': stats.get('fixtures', {}).get('wins', {}).get('total', 0),
-            'draws': stats.get('fixtures', {}).get('draws', {}).get('total', 0),
-            'losses': stats.get('fixtures', {}).get('loses', {}).get('total', 0)
+            'played': played.get('total', 0),
+            'wins': wins.get('total', 0),
+            'draws': draws.get('total', 0),
+            'losses': loses.get('total', 0)
         },
         'goals': {
             'for': {
-                'total': stats.get('goals', {}).get('for', {}).get('total', {}).get('total', 0),
-                'average': stats.get('goals', {}).get('for', {}).get('average', {}).get('total', 0),
-                'minute_distribution': stats.get('goals', {}).get('for', {}).get('minute', {})
+                'total': goals_for_total.get('total', 0),
+                'average': goals_for.get('average', {}).get('total', 0),
+                'minute_distribution': goals_for.get('minute', {})
             },
             'against': {
-                'total': stats.get('goals', {}).get('against', {}).get('total', {}).get('total', 0),
-                'average': stats.get('goals', {}).get('against', {}).get('average', {}).get('total', 0),
-                'minute_distribution': stats.get('goals', {}).get('against', {}).get('minute', {})
+                'total': goals_against_total.get('total', 0),
+                'average': goals_against.get('average', {}).get('total', 0),
+                'minute_distribution': goals_against.get('minute', {})
             }
         },
         'home': {
-            'played': stats.get('fixtures', {}).get('played', {}).get('home', 0),
-            'wins': stats.get('fixtures', {}).get('wins', {}).get('home', 0),
-            'draws': stats.get('fixtures', {}).get('draws', {}).get('home', 0),
-            'losses': stats.get('fixtures', {}).get('loses', {}).get('home', 0),
-            'goals_for': stats.get('goals', {}).get('for', {}).get('total', {}).get('home', 0),
-            'goals_against': stats.get('goals', {}).get('against', {}).get('total', {}).get('home', 0)
+            'played': played.get('home', 0),
+            'wins': wins.get('home', 0),
+            'draws': draws.get('home', 0),
+            'losses': loses.get('home', 0),
+            'goals_for': goals_for_total.get('home', 0),
+            'goals_against': goals_against_total.get('home', 0)
         },
         'away': {
-            'played': stats.get('fixtures', {}).get('played', {}).get('away', 0),
-            'wins': stats.get('fixtures', {}).get('wins', {}).get('away', 0),
-            'draws': stats.get('fixtures', {}).get('draws', {}).get('away', 0),
-            'losses': stats.get('fixtures', {}).get('loses', {}).get('away', 0),
-            'goals_for': stats.get('goals', {}).get('for', {}).get('total', {}).get('away', 0),
-            'goals_against': stats.get('goals', {}).get('against', {}).get('total', {}).get('away', 0)
+            'played': played.get('away', 0),
+            'wins': wins.get('away', 0),
+            'draws': draws.get('away', 0),
+            'losses': loses.get('away', 0),
+            'goals_for': goals_for_total.get('away', 0),
+            'goals_against': goals_against_total.get('away', 0)
         },
         'clean_sheets': {
-            'total': stats.get('clean_sheets', {}).get('total', 0),
-            'home': stats.get('clean_sheets', {}).get('home', 0),
-            'away': stats.get('clean_sheets', {}).get('away', 0)
+            'total': clean_sheets.get('total', 0),
+            'home': clean_sheets.get('home', 0),
+            'away': clean_sheets.get('away', 0)
         },
         'failed_to_score': {
-            'total': stats.get('failed_to_score', {}).get('total', 0),
-            'home': stats.get('failed_to_score', {}).get('home', 0),
-            'away': stats.get('failed_to_score', {}).get('away', 0)
+            'total': failed_to_score.get('total', 0),
+            'home': failed_to_score.get('home', 0),
+            'away': failed_to_score.get('away', 0)
         },
         'penalty': {
-            'scored': stats.get('penalty', {}).get('scored', {}).get('total', 0),
-            'missed': stats.get('penalty', {}).get('missed', {}).get('total', 0)
+            'scored': penalty.get('scored', {}).get('total', 0),
+            'missed': penalty.get('missed', {}).get('total', 0)
         },
         'cards': {
-            'yellow': stats.get('cards', {}).get('yellow', {}),
-            'red': stats.get('cards', {}).get('red', {})
+            'yellow': cards.get('yellow', {}),
+            'red': cards.get('red', {})
         },
         'form': stats.get('form', ''),
         'biggest': {
             'streak': {
-                'wins': stats.get('biggest', {}).get('streak', {}).get('wins', 0),
-                'draws': stats.get('biggest', {}).get('streak', {}).get('draws', 0),
-                'losses': stats.get('biggest', {}).get('streak', {}).get('loses', 0)
+                'wins': biggest_streak.get('wins', 0),
+                'draws': biggest_streak.get('draws', 0),
+                'losses': biggest_streak.get('loses', 0)
             },
             'wins': {
-                'home': stats.get('biggest', {}).get('wins', {}).get('home', ''),
-                'away': stats.get('biggest', {}).get('wins', {}).get('away', '')
+                'home': biggest_wins.get('home', ''),
+                'away': biggest_wins.get('away', '')
             },
             'losses': {
-                'home': stats.get('biggest', {}).get('loses', {}).get('home', ''),
-                'away': stats.get('biggest', {}).get('loses', {}).get('away', '')
+                'home': biggest_losses.get('home', ''),
+                'away': biggest_losses.get('away', '')
             },
             'goals': {
-                'for': stats.get('biggest', {}).get('goals', {}).get('for', {}).get('total', 0),
-                'against': stats.get('biggest', {}).get('goals', {}).get('against', {}).get('total', 0)
+                'for': biggest_goals.get('for', {}).get('total', 0),
+                'against': biggest_goals.get('against', {}).get('total', 0)
             }
         }
     }
     
     # Calculate additional metrics
-    if processed_stats['fixtures']['played'] > 0:
+    games = processed_stats['fixtures']['played']
+    if games > 0:
         processed_stats['metrics'] = {
             'points_per_game': (processed_stats['fixtures']['wins'] * 3 + 
-                              processed_stats['fixtures']['draws']) / 
-                              processed_stats['fixtures']['played'],
-            'goals_per_game': processed_stats['goals']['for']['total'] / 
-                             processed_stats['fixtures']['played'],
-            'goals_against_per_game': processed_stats['goals']['against']['total'] / 
-                                    processed_stats['fixtures']['played'],
-            'clean_sheet_percentage': (processed_stats['clean_sheets']['total'] / 
-                                     processed_stats['fixtures']['played']) * 100,
-            'scoring_rate': (1 - (processed_stats['failed_to_score']['total'] / 
-                                processed_stats['fixtures']['played'])) * 100
+                              processed_stats['fixtures']['draws']) / games,
+            'goals_per_game': processed_stats['goals']['for']['total'] / games,
+            'goals_against_per_game': processed_stats['goals']['against']['total'] / games,
+            'clean_sheet_percentage': (processed_stats['clean_sheets']['total'] / games) * 100,
+            'scoring_rate': (1 - (processed_stats['failed_to_score']['total'] / games)) * 100
         }
     
+    # The strength index only depends on these stats, so it is computed once and cached with them
+    processed_stats['strength'] = calculate_team_strength_index(processed_stats)
+    
     # Cache the processed stats
     cache.set('team_stats', cache_params, processed_stats)
     
@@ -1642,13 +1540,14 @@ def get_head_to_head(team1_id: int, team2_id: int, num_matches: int = 5) -> List
         
         # Extract statistics if available
         if 'statistics' in fixture:
+            home_id = fixture['teams']['home']['id']
             for team_stats in fixture['statistics']:
-                side = 'home' if team_stats.get('team', {}).get('id') == fixture['teams']['home']['id'] else 'away'
-                for stat in team_stats.get('statistics', []):
-                    if stat['type'] == 'Shots on Goal':
-                        stats['shots_on_goal'][side] = stat['value'] or 0
-                    elif stat['type'] == 'Ball Possession':
-                        stats['possession'][side] = stat['value'] or '50%'
+                side = 'home' if team_stats.get('team', {}).get('id') == home_id else 'away'
+                by_type = {stat['type']: stat['value'] for stat in team_stats.get('statistics', [])}
+                if 'Shots on Goal' in by_type:
+                    stats['shots_on_goal'][side] = by_type['Shots on Goal'] or 0
+                if 'Ball Possession' in by_type:
+                    stats['possession'][side] = by_type['Ball Possession'] or '50%'
         
         match_data = {
             'date': fixture['fixture']['date'],
@@ -1666,7 +1565,7 @@ def get_head_to_head(team1_id: int, team2_id: int, num_matches: int = 5) -> List
         }
         matches.append(match_data)
     
-    return sorted(matches, key=lambda x: datetime.strptime(x['date'], '%Y-%m-%dT%H:%M:%S%z'), reverse=True)
+    return sorted(matches, key=itemgetter('date'), reverse=True)  # ISO-8601 UTC dates sort as strings
 
 def calculate_league_averages(matches: List[Dict]) -> Dict[str, float]:
     """
@@ -1712,50 +1611,60 @@ def get_h2h_statistics(home_team_id: int, away_team_id: int) -> Dict:
     # Get head-to-head matches
     h2h_matches = get_head_to_head(home_team_id, away_team_id)
     
+    # Orient every match to the home team once; the h2h endpoint only returns meetings of the two
+    is_home, team1_scored, team2_scored = _match_arrays(h2h_matches, home_team_id)
+    goal_diffs = team1_scored - team2_scored
+    team1_won = goal_diffs > 0
+    
     # Calculate basic stats
-    team1_wins = sum(1 for match in h2h_matches 
-                    if (match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                       (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals']))
-    team2_wins = sum(1 for match in h2h_matches 
-                    if (match['home_team'] == away_team_id and match['home_goals'] > match['away_goals']) or
-                       (match['away_team'] == away_team_id and match['away_goals'] > match['home_goals']))
-    draws = sum(1 for match in h2h_matches if match['home_goals'] == match['away_goals'])
     total_matches = len(h2h_matches)
+    team1_wins = int(np.count_nonzero(team1_won))
+    team2_wins = int(np.count_nonzero(goal_diffs < 0))
+    draws = total_matches - team1_wins - team2_wins
     
     # Calculate average goals
-    team1_goals = sum(match['home_goals'] if match['home_team'] == home_team_id 
-                     else match['away_goals'] for match in h2h_matches)
-    team2_goals = sum(match['home_goals'] if match['home_team'] == away_team_id 
-                     else match['away_goals'] for match in h2h_matches)
-    
-    avg_team1_goals = team1_goals / total_matches if total_matches > 0 else 0
-    avg_team2_goals = team2_goals / total_matches if total_matches > 0 else 0
+    avg_team1_goals = int(team1_scored.sum()) / total_matches if total_matches > 0 else 0
+    avg_team2_goals = int(team2_scored.sum()) / total_matches if total_matches > 0 else 0
     
     # Calculate weighted dominance
-    recent_matches = h2h_matches[:min(5, total_matches)]
-    recent_dominance = sum(1 for match in recent_matches 
-                         if (match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                            (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals'])) / len(recent_matches) if recent_matches else 0.5
+    recent_dominance = float(team1_won[:5].mean()) if total_matches > 0 else 0.5
     overall_dominance = team1_wins / total_matches if total_matches > 0 else 0.5
     weighted_dominance = (recent_dominance * 0.6) + (overall_dominance * 0.4)
     
     # Calculate venue advantage
-    home_matches = [match for match in h2h_matches if match['home_team'] == home_team_id]
-    home_wins = sum(1 for match in home_matches if match['home_goals'] > match['away_goals'])
-    venue_advantage = (home_wins / len(home_matches)) * 2 if home_matches else 1.0
+    home_matches = int(np.count_nonzero(is_home))
+    home_wins = int(np.count_nonzero(team1_won & is_home))
+    venue_advantage = (home_wins / home_matches) * 2 if home_matches else 1.0
     
     # Calculate result consistency
     if total_matches >= 3:
-        results = [(match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                  (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals'])
-                  for match in h2h_matches[-3:]]
-        consistency = sum(1 for i in range(len(results)-1) if results[i] == results[i+1]) / (len(results)-1)
+        results = team1_won[-3:]
+        consistency = float(np.mean(results[1:] == results[:-1]))
     else:
         consistency = 0.5
     
     # Calculate h2h factor
     h2h_factor = (weighted_dominance * 0.4 + venue_advantage * 0.4 + consistency * 0.2) * 1.5
     
+    # Build the trend lists for the last five meetings in one pass
+    goal_difference_trend = []
+    match_dominance = []
+    recent_matches = []
+    for match, home, scored, conceded, diff in zip(h2h_matches[-5:], is_home[-5:].tolist(),
+                                                   team1_scored[-5:].tolist(), team2_scored[-5:].tolist(),
+                                                   goal_diffs[-5:].tolist()):
+        dominance = 1 if diff > 0 else 0 if diff else 0.5
+        goal_difference_trend.append(diff)
+        match_dominance.append(dominance)
+        recent_matches.append({
+            'date': match['date'],
+            'team1_goals': scored,
+            'team2_goals': conceded,
+            'venue': 'home' if home else 'away',
+            'goal_difference': diff,
+            'dominance': dominance
+        })
+    
     h2h_stats = {
         'h2h_factor': h2h_factor,
         'stats': {
@@ -1774,35 +1683,9 @@ def get_h2h_statistics(home_team_id: int, away_team_id: int) -> Dict:
             'venue_advantage': venue_advantage
         },
         'trends': {
-            'goal_differences': [
-                match['home_goals'] - match['away_goals'] 
-                if match['home_team'] == home_team_id
-                else match['away_goals'] - match['home_goals']
-                for match in h2h_matches[-5:]
-            ],
-            'match_dominance': [
-                1 if (match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                     (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals'])
-                else 0 if match['home_goals'] != match['away_goals']
-                else 0.5
-                for match in h2h_matches[-5:]
-            ],
-            'recent_matches': [
-                {
-                    'date': match['date'],
-                    'team1_goals': match['home_goals'] if match['home_team'] == home_team_id else match['away_goals'],
-                    'team2_goals': match['away_goals'] if match['home_team'] == home_team_id else match['home_goals'],
-                    'venue': 'home' if match['home_team'] == home_team_id else 'away',
-                    'goal_difference': match['home_goals'] - match['away_goals'] 
-                        if match['home_team'] == home_team_id
-                        else match['away_goals'] - match['home_goals'],
-                    'dominance': 1 if (match['home_team'] == home_team_id and match['home_goals'] > match['away_goals']) or
-                                    (match['away_team'] == home_team_id and match['away_goals'] > match['home_goals'])
-                                else 0 if match['home_goals'] != match['away_goals']
-                                else 0.5
-                }
-                for match in h2h_matches[-5:]
-            ]
+            'goal_differences': goal_difference_trend,
+            'match_dominance': match_dominance,
+            'recent_matches': recent_matches
         },
         'confidence': 'high' if total_matches >= 5 else 'medium' if total_matches >= 3 else 'low',
         'matches_analyzed': total_matches
@@ -1912,22 +1795,17 @@ def test_predict_match(home_team_id: int, away_team_id: int, league_id: int) ->
     
     # Simple Poisson calculation
     max_goals = 5
-    score_probs = np.zeros((max_goals + 1, max_goals + 1))
-    
-    for i in range(max_goals + 1):
-        for j in range(max_goals + 1):
-            score_probs[i, j] = poisson.pmf(i, home_xg) * poisson.pmf(j, away_xg)
-    
-    # Calculate outcome probabilities
-    home_win_prob = float(np.sum(np.tril(score_probs, -1)))
-    away_win_prob = float(np.sum(np.triu(score_probs, 1)))
-    draw_prob = float(np.sum(np.diag(score_probs)))
-    
-    # Normalize probabilities
-    total_prob = home_win_prob + away_win_prob + draw_prob
-    home_win_prob /= total_prob
-    away_win_prob /= total_prob
-    draw_prob /= total_prob
+    home_pmf = _poisson_pmf(home_xg)[:max_goals + 1]
+    away_pmf = _poisson_pmf(away_xg)[:max_goals + 1]
+    score_probs = np.outer(home_pmf, away_pmf)
+    
+    # Calculate outcome probabilities, normalized over the truncated grid in one step
+    outcome_probs = np.array([
+        np.tril(score_probs, -1).sum(),
+        home_pmf @ away_pmf,  # The diagonal of the outer product
+        np.triu(score_probs, 1).sum()
+    ])
+    home_win_prob, draw_prob, away_win_prob = (outcome_probs / outcome_probs.sum()).tolist()
     
     # Calculate expected cards
     base_cards = 3.5  # Average cards per game
@@ -1948,6 +1826,7 @@ def test_predict_match(home_team_id: int, away_team_id: int, league_id: int) ->
     # Split cards between teams (home teams typically get slightly fewer cards)
     home_cards = expected_cards * 0.45
     away_cards = expected_cards * 0.55
+    card_tail = 1 - np.cumsum(_poisson_pmf(expected_cards))  # P(more than k cards)
     
     return {
         'probabilities': {
@@ -1963,19 +1842,47 @@ def test_predict_match(home_team_id: int, away_team_id: int, league_id: int) ->
             'total': float(expected_cards),
             'home': float(home_cards),
             'away': float(away_cards),
-            'over_2.5_cards': float(1 - poisson.cdf(2, expected_cards)),
-            'over_3.5_cards': float(1 - poisson.cdf(3, expected_cards)),
-            'over_4.5_cards': float(1 - poisson.cdf(4, expected_cards))
+            'over_2.5_cards': float(card_tail[2]),
+            'over_3.5_cards': float(card_tail[3]),
+            'over_4.5_cards': float(card_tail[4])
         }
     }
 
 def calculate_over_probability(expected: float, threshold: float) -> float:
     """Calculate the probability of over X goals/cards."""
-    return float(1 - poisson.cdf(threshold, expected))
+    return float(1 - _poisson_cdf(threshold, expected))
 
 def calculate_under_probability(expected: float, threshold: float) -> float:
     """Calculate the probability of under X goals/cards."""
-    return float(poisson.cdf(threshold, expected))
+    return float(_poisson_cdf(threshold, expected))
+
+# Bump whenever the prediction model changes, so predictions cached by older code are not served
+PREDICTION_MODEL_VERSION = 2
+
+def _prediction_cache_params(home_team_id: int, away_team_id: int, league_id: int) -> Dict:
+    """Cache parameters identifying a match prediction made by the current model."""
+    return {
+        'home_team_id': home_team_id,
+        'away_team_id': away_team_id,
+        'league_id': league_id,
+        'model_version': PREDICTION_MODEL_VERSION
+    }
+
+def _prefetch_team_statistics(executor: ThreadPoolExecutor, matches: List[Tuple[int, int, int]]) -> None:
+    """
+    Fetch statistics once per (team, league) for (home_team_id, away_team_id, league_id) matches.
+    
+    Done up front so fixtures sharing a team don't race to request it; matches that already
+    have a cached prediction are skipped, since predicting them needs no statistics.
+    """
+    teams = dict.fromkeys(
+        (team_id, league_id)
+        for home_team_id, away_team_id, league_id in matches
+        if cache.get('predictions', _prediction_cache_params(home_team_id, away_team_id, league_id),
+                     max_age_hours=24 * 7) is None
+        for team_id in (home_team_id, away_team_id)
+    )
+    list(executor.map(lambda team: get_team_statistics(*team), teams))
 
 def predict_batch_matches(fixtures: List[Dict], max_workers: int = 3) -> List[Dict]:
     """Predict multiple matches in parallel with improved caching"""
@@ -1983,12 +1890,14 @@ def predict_batch_matches(fixtures: List[Dict], max_workers: int = 3) -> List[Di
     
     def predict_single_match(fixture):
         try:
+            cache_params = _prediction_cache_params(
+                fixture['home_team_id'],
+                fixture['away_team_id'],
+                fixture['league_id']
+            )
+            
             # Try to get cached prediction first with 7-day duration
-            cached = cache.get('predictions', {
-                'home_team_id': fixture['home_team_id'],
-                'away_team_id': fixture['away_team_id'],
-                'league_id': fixture['league_id']
-            }, max_age_hours=24 * 7)
+            cached = cache.get('predictions', cache_params, max_age_hours=24 * 7)
             
             if cached:
                 return cached
@@ -2001,11 +1910,7 @@ def predict_batch_matches(fixtures: List[Dict], max_workers: int = 3) -> List[Di
             )
             
             # Cache the result with 7-day duration
-            cache.set('predictions', {
-                'home_team_id': fixture['home_team_id'],
-                'away_team_id': fixture['away_team_id'],
-                'league_id': fixture['league_id']
-            }, result)
+            cache.set('predictions', cache_params, result)
             
             return result
         except Exception as e:
@@ -2013,23 +1918,21 @@ def predict_batch_matches(fixtures: List[Dict], max_workers: int = 3) -> List[Di
             return create_fallback_prediction()
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        _prefetch_team_statistics(executor, [
+            (fixture['home_team_id'], fixture['away_team_id'], fixture['league_id'])
+            for fixture in fixtures
+        ])
         results = list(executor.map(predict_single_match, fixtures))
     
     return results
 
-# Initialize the prediction cache
-_prediction_cache = {}
-_cache_ttl = 60  # Cache for 1 minute
-
 def get_cached_prediction(home_team_id, away_team_id, league_id):
     """Get a cached prediction if available, otherwise calculate a new one"""
     try:
+        cache_params = _prediction_cache_params(home_team_id, away_team_id, league_id)
+        
         # Use the DataCache instance's get method with longer cache duration
-        cached = cache.get('predictions', {
-            'home_team_id': home_team_id,
-            'away_team_id': away_team_id,
-            'league_id': league_id
-        }, max_age_hours=24 * 7)  # Cache for 7 days
+        cached = cache.get('predictions', cache_params, max_age_hours=24 * 7)  # Cache for 7 days
         
         if cached:
             print(f"DEBUG: Using cached prediction for {home_team_id} vs {away_team_id}")
@@ -2040,13 +1943,20 @@ def get_cached_prediction(home_team_id, away_team_id, league_id):
         result = predict_match(home_team_id, away_team_id, league_id)
         
         # Cache the result with 7-day duration
-        cache.set('predictions', {
-            'home_team_id': home_team_id,
-            'away_team_id': away_team_id,
-            'league_id': league_id
-        }, result)
+        cache.set('predictions', cache_params, result)
         
         return result
     except Exception as e:
         print(f"ERROR: Prediction error in cache function: {str(e)}")
-        return create_fallback_prediction()
\ No newline at end of file
+        return create_fallback_prediction()
+
+def get_cached_predictions_batch(matches: List[Tuple[int, int, int]], max_workers: int = 4) -> List[Dict]:
+    """Get predictions for several (home_team_id, away_team_id, league_id) matches concurrently.
+    
+    Each match goes through get_cached_prediction, which is dominated by API and cache I/O,
+    so the fixtures of a gameweek can be predicted side by side. Team statistics are fetched
+    once per team for the whole batch. Results keep the input order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        _prefetch_team_statistics(executor, matches)
+        return list(executor.map(lambda match: get_cached_prediction(*match), matches))
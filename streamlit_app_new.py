@@ -1,5 +1,6 @@
 import os
 import sys
+import logging
 from pathlib import Path
 import time
 import re
@@ -29,6 +30,9 @@ import streamlit.components.v1 as components
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
+# App-wide log level; set MBB_LOG=DEBUG to see per-request API diagnostics
+logging.basicConfig(level=os.getenv('MBB_LOG', 'INFO'))
+
 from lib.fetch_fixtures import (
     fetch_fixtures, fetch_standings, LEAGUES,
     fetch_head_to_head, fetch_team_statistics, fetch_players,
@@ -37,7 +41,9 @@ from lib.fetch_fixtures import (
     api_football_request
 )
 import random
-from lib.predictions import predict_match, create_fallback_prediction, get_cached_prediction
+from lib.predictions import (
+    predict_match, create_fallback_prediction, get_cached_prediction, get_cached_predictions_batch
+)
 
 # Add a helper function for predicted result
 def get_predicted_result(home_team_id, away_team_id, league_id):
@@ -122,26 +128,23 @@ def display_selected_fixtures():
     <tbody>
     """
     
-    # Build the rows HTML
+    # Predict all selected fixtures concurrently, then build the rows HTML
+    predictions = get_cached_predictions_batch([
+        (fixture.get('home_team_id', '0'), fixture.get('away_team_id', '0'), fixture.get('league', 39))
+        for fixture in selected_fixtures
+    ])
+    
     rows_html = ""
-    for fixture in selected_fixtures:
+    for fixture, prediction in zip(selected_fixtures, predictions):
         # Extract fixture details
         home_team = fixture['Home Team']
         away_team = fixture['Away Team']
         date = fixture['Date']
         home_team_id = fixture.get('home_team_id', '0')
         away_team_id = fixture.get('away_team_id', '0')
-        league_id = fixture.get('league', 39)
         home_position = fixture.get('Home Position', 'N/A')
         away_position = fixture.get('Away Position', 'N/A')
         
-        # Calculate predictions
-        prediction = get_cached_prediction(
-            home_team_id,
-            away_team_id,
-            league_id
-        )
-        
         home_win_pct = int(prediction['probabilities']['home_win'] * 100)
         draw_pct = int(prediction['probabilities']['draw'] * 100)
         away_win_pct = int(prediction['probabilities']['away_win'] * 100)
@@ -1454,12 +1457,9 @@ if standings:
             fixtures_df = pd.DataFrame(fixtures)
             
             if not fixtures_df.empty:
-                # Convert standings to DataFrame for mapping
-                current_standings_df = pd.DataFrame(standings[league])
-
-                # Convert 'rank' column to integer to avoid decimal points
-                if 'rank' in current_standings_df.columns:
-                    current_standings_df['rank'] = current_standings_df['rank'].astype(int)
+                # Standings already arrive as a DataFrame per league with an integer 'rank'; the
+                # frame is shared with the last-good fallback, so it is read here, never modified
+                current_standings_df = standings[league]
 
                 # Add position columns for home and away teams
                 fixtures_df['Home Position'] = fixtures_df['homeTeam'].map(current_standings_df.set_index('team')['rank'])
@@ -1,4 +1,5 @@
-from lib.cache import cache
+from lib.cache import cache, DataCache
+import os
 import time
 from datetime import datetime, timedelta
 
@@ -48,5 +49,90 @@ def test_cache():
     
     print("\nAll tests passed successfully!")
 
+def test_file_cache(tmp_path):
+    print("Testing file-backed cache...")
+    
+    # A fresh instance has an empty memory cache, so this exercises the disk round-trip
+    writer = DataCache(cache_dir=str(tmp_path))
+    writer.set('team_stats', {'team_id': 33, 'league': 39}, {'goals': [1, 2, 3], 'rate': 1.5})
+    
+    reader = DataCache(cache_dir=str(tmp_path))
+    result = reader.get('team_stats', {'league': 39, 'team_id': 33})
+    print("File cache result:", result)
+    assert result == {'goals': [1, 2, 3], 'rate': 1.5}, "File cache round-trip failed"
+    
+    # Clearing through an instance that only knows the file from its startup index
+    DataCache(cache_dir=str(tmp_path)).clear('team_stats')
+    result = DataCache(cache_dir=str(tmp_path)).get('team_stats', {'team_id': 33, 'league': 39})
+    print("After indexed clear result:", result)
+    assert result is None, "Indexed cache clear failed"
+
+def test_memory_cache_eviction(tmp_path):
+    print("Testing in-memory LRU eviction...")
+    
+    small_cache = DataCache(cache_dir=str(tmp_path), max_memory_entries=2)
+    small_cache.set('test', {'id': 1}, 'one')
+    small_cache.set('test', {'id': 2}, 'two')
+    small_cache.get('test', {'id': 1})  # Touch id 1 so id 2 becomes least recently used
+    small_cache.set('test', {'id': 3}, 'three')
+    
+    memory_keys = set(small_cache._memory_cache)
+    print("Memory cache keys:", memory_keys)
+    assert len(memory_keys) == 2, "Memory cache exceeded its size bound"
+    assert small_cache._get_cache_key('test', {'id': 2}) not in memory_keys, "Wrong entry evicted"
+    
+    # Evicted entries are still served from the file cache
+    assert small_cache.get('test', {'id': 2}) == 'two', "Evicted entry not reloaded from disk"
+
+def test_unhashable_params(tmp_path):
+    print("Testing parameters with list and dict values...")
+    
+    param_cache = DataCache(cache_dir=str(tmp_path))
+    params = {'ids': [1, 2], 'filters': {'status': 'FT'}}
+    assert param_cache.get('test', params) is None, "Unhashable parameters should be a cache miss"
+    
+    param_cache.set('test', params, {'value': 'listed'})
+    result = param_cache.get('test', {'filters': {'status': 'FT'}, 'ids': [1, 2]})
+    print("Unhashable params result:", result)
+    assert result == {'value': 'listed'}, "Unhashable parameters not cached"
+
+def test_equal_values_of_different_types(tmp_path):
+    print("Testing keys for 1, 1.0 and True...")
+    
+    typed_cache = DataCache(cache_dir=str(tmp_path))
+    keys = [typed_cache._get_cache_key('test', {'a': value}) for value in (1, 1.0, True)]
+    print("Cache keys:", keys)
+    assert len(set(keys)) == 3, "Equal values of different types must not share a cache key"
+    assert keys == [typed_cache._get_cache_key('test', {'a': value}) for value in (True, 1.0, 1)][::-1], \
+        "Cache keys must not depend on call order"
+
+def test_corrupt_file_self_heals(tmp_path):
+    print("Testing recovery from a corrupt cache file...")
+    
+    corrupt_cache = DataCache(cache_dir=str(tmp_path))
+    corrupt_cache.set('test', {'id': 1}, {'value': 'ok'})
+    cache_path = corrupt_cache._get_cache_path(corrupt_cache._get_cache_key('test', {'id': 1}))
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path)), "Temporary file left behind after write"
+    
+    with open(cache_path, 'w') as f:
+        f.write('{"timestamp": 17')  # Simulate an interrupted write
+    
+    result = DataCache(cache_dir=str(tmp_path)).get('test', {'id': 1})
+    print("Corrupt cache result:", result)
+    assert result is None, "Corrupt cache file should be treated as a miss"
+    assert not os.path.exists(cache_path), "Corrupt cache file was not removed"
+
+def test_keep_expired(tmp_path):
+    print("Testing stale entries kept for fallback...")
+    
+    stale_cache = DataCache(cache_dir=str(tmp_path))
+    stale_cache.set('api', {'endpoint': 'leagues'}, {'response': [1]})
+    
+    assert stale_cache.get('api', {'endpoint': 'leagues'}, max_age_hours=0, keep_expired=True) is None, \
+        "Expired entry should not be returned as fresh"
+    result = DataCache(cache_dir=str(tmp_path)).get('api', {'endpoint': 'leagues'}, max_age_hours=24)
+    print("Stale fallback result:", result)
+    assert result == {'response': [1]}, "Expired entry was removed despite keep_expired"
+
 if __name__ == "__main__":
     test_cache() 
\ No newline at end of file
@@ -0,0 +1,63 @@
+from lib.predictions import calculate_poisson_probabilities, calculate_team_stats
+import math
+
+def test_poisson_probabilities():
+    print("Testing Poisson outcome probabilities...")
+
+    home_stats = {
+        'metrics': {'goals_per_game': 2.1},
+        'strength': {'attack_strength': 1.3, 'defense_strength': 0.9},
+        'position': 2,
+        'points': 50
+    }
+    away_stats = {
+        'metrics': {'goals_per_game': 0.8},
+        'strength': {'attack_strength': 0.7, 'defense_strength': 1.2},
+        'position': 15,
+        'points': 20
+    }
+    result = calculate_poisson_probabilities(home_stats, away_stats, {'h2h_factor': 1.05})
+    probs = result['probabilities']
+    print("Probabilities:", probs)
+
+    assert math.isclose(sum(probs.values()), 1.0), "Probabilities should sum to 1"
+    assert math.isclose(probs['home_win'], 0.7338273183816363), "Home win probability changed"
+    assert math.isclose(probs['draw'], 0.16616776422503687), "Draw probability changed"
+    assert math.isclose(probs['away_win'], 0.10000491739332688), "Away win probability changed"
+    assert math.isclose(result['expected_goals']['home'], 2.436525), "Home xG changed"
+
+def test_poisson_probabilities_defaults():
+    print("Testing Poisson probabilities with missing stats...")
+
+    probs = calculate_poisson_probabilities({}, {}, {})['probabilities']
+    print("Probabilities:", probs)
+    assert math.isclose(probs['home_win'], 0.3851115783131971), "Default home win probability changed"
+    assert math.isclose(probs['draw'], 0.24297110063106736), "Default draw probability changed"
+
+def test_team_stats():
+    print("Testing team statistics aggregation...")
+
+    matches = {
+        'current_league': [
+            {'date': '2024-03-02T15:00:00+00:00', 'home_team': 40, 'away_team': 33, 'home_goals': 2, 'away_goals': 2},
+            {'date': '2024-02-10T15:00:00+00:00', 'home_team': 33, 'away_team': 41, 'home_goals': 3, 'away_goals': 0},
+            {'date': '2024-02-24T15:00:00+00:00', 'home_team': 42, 'away_team': 33, 'home_goals': 1, 'away_goals': 0}
+        ],
+        'other_leagues': [
+            {'date': '2023-05-01T15:00:00+00:00', 'home_team': 33, 'away_team': 70, 'home_goals': 0, 'away_goals': 1}
+        ]
+    }
+    stats = calculate_team_stats(33, matches)
+    current = stats['current_league']
+    print("Current league stats:", current)
+
+    assert current['form_sequence'] == ['W', 'L', 'D'], "Form should follow match dates"
+    assert (current['wins'], current['draws'], current['losses']) == (1, 1, 1), "Wrong result counts"
+    assert (current['goals_scored'], current['goals_conceded']) == (5, 3), "Wrong goal totals"
+    assert (current['home_wins'], current['away_losses'], current['away_draws']) == (1, 1, 1), "Wrong home/away split"
+    assert (current['clean_sheets'], current['failed_to_score']) == (1, 1), "Wrong clean sheet counts"
+    assert stats['other_leagues']['losses'] == 1, "Wrong other-league results"
+    assert stats['recent_form']['points_last_8'] == 4, "Wrong recent form points"
+
+if __name__ == "__main__":
+    test_poisson_probabilities()